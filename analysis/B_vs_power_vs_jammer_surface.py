@@ -2,8 +2,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.interpolate import griddata
 import numpy as np
-import ast
-import csv
+from results import load_results, small_component_nodes
 from matplotlib.colors import ListedColormap
 from matplotlib.lines import Line2D
 
@@ -12,7 +11,6 @@ COMPONENT_THRESHOLD = 0
 csv_filename = "./backup/10x20x20-small-domain-number-cumulative-old-reduced.csv"
 # csv_filename = "20x20x20-standard-domain-number-cumulative.csv"
 # csv_filename = "10x20x20-small-domain-number-cumulative.csv"
-expected_fields = 13
 
 ELEVATION = -128
 AZIMUTH = -126
@@ -26,46 +24,8 @@ ROLL = 120
 # AZIMUTH = -100
 # ROLL = 100
 
-def find_garbled_lines(csv_filename, expected_fields):
-    garbled_lines = []
-    total_lines = 0
-
-    print("Checking for garbled lines in the CSV file...")
-
-    with open(csv_filename, 'r') as file:
-        reader = csv.reader(file)
-        for line_number, row in enumerate(reader, start=1):
-            total_lines += 1
-            if len(row) != expected_fields:
-                print(f"Garbled line detected at line {line_number}: {row}")
-                garbled_lines.append(line_number)
-
-    return total_lines, garbled_lines
-
-def remove_garbled_lines(csv_filename, garbled_lines):
-    with open(csv_filename, 'r') as file:
-        lines = file.readlines()
-
-    with open(csv_filename, 'w') as file:
-        for line_number, line in enumerate(lines, start=1):
-            if line_number not in garbled_lines:
-                file.write(line)
-            else:
-                print(f"Removing garbled line {line_number}")
-
 def read_data():
-    total_lines, garbled_lines = find_garbled_lines(csv_filename, expected_fields)
-
-    print(f"\nTotal lines: {total_lines}")
-    print(f"Garbled lines: {len(garbled_lines)}")
-
-    if len(garbled_lines) > 0:
-        remove_garbled_lines(csv_filename, garbled_lines)
-        print(f"{len(garbled_lines)} garbled lines removed.")
-    else:
-        print("No garbled lines found.")
-
-    df = pd.read_csv(csv_filename)
+    df = load_results(csv_filename)
 
     numeric_columns = ['power', 'total_nodes', 'num_jamming', 'num_unconnected']
     df[numeric_columns] = df[numeric_columns].apply(pd.to_numeric, errors='coerce')
@@ -73,36 +33,21 @@ def read_data():
 
     df = df.dropna(subset=numeric_columns)
 
-    def parse_connected_components(component_str):
-        try:
-            component_dict = ast.literal_eval(component_str)
-            return [int(nodes) for nodes in component_dict.values()]
-        except (ValueError, SyntaxError):
-            return []
-
-    df['connected_components_list'] = df['connected_components'].apply(parse_connected_components)
-
-    def calculate_additional_unconnected_nodes(row):
-        small_components = [nodes for nodes in row['connected_components_list'] if nodes < COMPONENT_THRESHOLD * row['total_nodes']]
-        return sum(small_components)
-
-    df['additional_unconnected_nodes'] = df.apply(calculate_additional_unconnected_nodes, axis=1)
+    # Component sizes come back as a list column, so small components are summed without parsing each row
+    df['additional_unconnected_nodes'] = small_component_nodes(df, COMPONENT_THRESHOLD)
     df['B'] = df['num_unconnected'] - df['num_jamming'] + df['additional_unconnected_nodes']
 
-    def classify(row):
-        fail_overwhelming = row['num_jamming'] > int((row['total_nodes'] - 1 - row['B']) / 3)
-        fail_partition = not (row['num_connected_components'] == 1 or any(nodes >= RATIO * row['total_nodes'] for nodes in row['connected_components_list']))
-
-        if fail_overwhelming and fail_partition:
-            return 'orange'
-        elif fail_overwhelming:
-            return 'red'
-        elif fail_partition:
-            return 'purple'
-        else:
-            return 'green'
+    # Classification based on failure modes
+    # Fail due to overwhelming if num_jamming exceeds the threshold
+    fail_overwhelming = df['num_jamming'] > np.trunc((df['total_nodes'] - 1 - df['B']) / 3)
+    # Fail due to partitioning if there is no single large component or all components are too small
+    fail_partition = ~((df['num_connected_components'] == 1) | (df['largest_component'] >= RATIO * df['total_nodes']))
 
-    df['classification'] = df.apply(classify, axis=1)
+    df['classification'] = np.select(
+        [fail_overwhelming & fail_partition, fail_overwhelming, fail_partition],
+        ['orange', 'red', 'purple'],  # Fail by both, by overwhelming, by partition
+        default='green'  # Pass
+    )
 
     return df
 
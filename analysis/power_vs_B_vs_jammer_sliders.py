@@ -1,67 +1,19 @@
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
-import ast
-import csv
+from results import load_results, small_component_nodes
 
 # Global variables for initial thresholds
 RATIO = 0.667  # Threshold for partition failure
 COMPONENT_THRESHOLD = 0  # Threshold for adding small components to the unconnected count
 csv_filename = "20x20x20-standard-domain-number-cumulative.csv"
-expected_fields = 13  # The expected number of fields per line
-
-def find_garbled_lines(csv_filename, expected_fields):
-    """
-    Identify lines in the CSV file that do not have the expected number of fields.
-    """
-    garbled_lines = []
-    total_lines = 0
-
-    print("Checking for garbled lines in the CSV file...")
-
-    with open(csv_filename, 'r') as file:
-        reader = csv.reader(file)
-        for line_number, row in enumerate(reader, start=1):
-            total_lines += 1
-            if len(row) != expected_fields:
-                print(f"Garbled line detected at line {line_number}: {row}")
-                garbled_lines.append(line_number)
-
-    return total_lines, garbled_lines
-
-def remove_garbled_lines(csv_filename, garbled_lines):
-    """
-    Remove lines from the CSV file that have been identified as garbled.
-    """
-    with open(csv_filename, 'r') as file:
-        lines = file.readlines()
-
-    # Write back all lines except the garbled ones
-    with open(csv_filename, 'w') as file:
-        for line_number, line in enumerate(lines, start=1):
-            if line_number not in garbled_lines:
-                file.write(line)
-            else:
-                print(f"Removing garbled line {line_number}")
 
 def read_data(ratio, component_threshold):
     """
-    Read the CSV data and process it for plotting, removing garbled lines if necessary.
+    Read the sweep results and process them for plotting.
     """
-    # Detect and handle garbled lines
-    total_lines, garbled_lines = find_garbled_lines(csv_filename, expected_fields)
-
-    print(f"\nTotal lines: {total_lines}")
-    print(f"Garbled lines: {len(garbled_lines)}")
-
-    if len(garbled_lines) > 0:
-        remove_garbled_lines(csv_filename, garbled_lines)
-        print(f"{len(garbled_lines)} garbled lines removed.")
-    else:
-        print("No garbled lines found.")
-
-    # Load the cleaned data
-    df = pd.read_csv(csv_filename)
+    df = load_results(csv_filename)
 
     # Convert columns to numeric and handle errors by coercing them to NaN
     numeric_columns = ['power', 'total_nodes', 'num_jamming', 'num_unconnected']
@@ -71,44 +23,21 @@ def read_data(ratio, component_threshold):
     # Drop rows with NaN values in any column except 'distance'
     df = df.dropna(subset=numeric_columns)
 
-    # Parse connected components to list
-    def parse_connected_components(component_str):
-        try:
-            component_dict = ast.literal_eval(component_str)
-            return [int(nodes) for nodes in component_dict.values()]
-        except (ValueError, SyntaxError):
-            return []
-
-    df['connected_components_list'] = df['connected_components'].apply(parse_connected_components)
-
-    # Calculate additional nodes to add to B from subcomponents smaller than COMPONENT_THRESHOLD
-    def calculate_additional_unconnected_nodes(row):
-        small_components = [nodes for nodes in row['connected_components_list'] if nodes < component_threshold * row['total_nodes']]
-        return sum(small_components)
-
-    # Calculate B
-    df['additional_unconnected_nodes'] = df.apply(calculate_additional_unconnected_nodes, axis=1)
+    # Component sizes come back as a list column, so small components are summed without parsing each row
+    df['additional_unconnected_nodes'] = small_component_nodes(df, component_threshold)
     df['B'] = df['num_unconnected'] - df['num_jamming'] + df['additional_unconnected_nodes']
 
     # Classification based on failure modes
-    def classify(row):
-        # Fail due to overwhelming if num_jamming exceeds the threshold
-        fail_overwhelming = row['num_jamming'] > int((row['total_nodes'] - 1 - row['B']) / 3)
-        
-        # Fail due to partitioning if there is no single large component or all components are too small
-        fail_partition = not (row['num_connected_components'] == 1 or
-                              any(nodes >= ratio * row['total_nodes'] for nodes in row['connected_components_list']))
-
-        if fail_overwhelming and fail_partition:
-            return 'orange'  # Fail by both overwhelming and partition
-        elif fail_overwhelming:
-            return 'red'  # Fail by overwhelming
-        elif fail_partition:
-            return 'purple'  # Fail by partition
-        else:
-            return 'green'  # Pass
-
-    df['classification'] = df.apply(classify, axis=1)
+    # Fail due to overwhelming if num_jamming exceeds the threshold
+    fail_overwhelming = df['num_jamming'] > np.trunc((df['total_nodes'] - 1 - df['B']) / 3)
+    # Fail due to partitioning if there is no single large component or all components are too small
+    fail_partition = ~((df['num_connected_components'] == 1) | (df['largest_component'] >= ratio * df['total_nodes']))
+
+    df['classification'] = np.select(
+        [fail_overwhelming & fail_partition, fail_overwhelming, fail_partition],
+        ['orange', 'red', 'purple'],  # Fail by both, by overwhelming, by partition
+        default='green'  # Pass
+    )
 
     return df
 
@@ -2,11 +2,12 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 import numpy as np
+from results import load_results
 
 csv_filename = "7x25x25-standard-plane-number-cumulative.csv"
 
 def plot_data():
-    df = pd.read_csv(csv_filename)
+    df = load_results(csv_filename)
 
     df = df.dropna(subset=['status'])
     df = df[df['status'].isin(['Pass', 'Fail'])]
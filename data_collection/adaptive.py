@@ -0,0 +1,53 @@
+import numpy as np
+
+
+def outcome(results):
+    # What a point is classified as: status plus which of the two pass conditions held
+    return results['status'], bool(results['trustset_configuration']), int(results['num_connected_components']) == 1
+
+
+def initial_step(n, intervals):
+    # Largest power of two giving at least `intervals` intervals along an axis of n points
+    if n <= 1:
+        return 1
+    return max(1, 2 ** int(np.floor(np.log2(max(1, (n - 1) / intervals)))))
+
+
+def axis_points(lo, hi, step):
+    return sorted(set(range(lo, hi, step)) | {hi})
+
+
+def intervals(points):
+    return list(zip(points, points[1:])) or [(points[0], points[0])]
+
+
+def adaptive_sweep(shape, evaluate, coarse=(8, 8)):
+    # Samples a (powers x values) index grid coarsely, then keeps halving the step only inside cells whose
+    # corners disagree, until neighbouring indices are reached. evaluate(cells) takes a list of (i, j)
+    # grid indices and returns {(i, j): set of outcomes over that point's iterations}.
+    steps = [initial_step(n, c) for n, c in zip(shape, coarse)]
+    regions = [(0, shape[0] - 1, 0, shape[1] - 1)]
+    outcomes = {}
+
+    while regions:
+        todo = set()
+        for i0, i1, j0, j1 in regions:
+            todo.update((i, j) for i in axis_points(i0, i1, steps[0]) for j in axis_points(j0, j1, steps[1]))
+        outcomes.update(evaluate(sorted(todo - outcomes.keys())))
+
+        if steps == [1, 1]:
+            break
+
+        # A region is refined where the outcomes at its corners, over all iterations, are not all the same
+        refine = set()
+        for i0, i1, j0, j1 in regions:
+            for a, b in intervals(axis_points(i0, i1, steps[0])):
+                for c, d in intervals(axis_points(j0, j1, steps[1])):
+                    seen = set().union(outcomes[a, c], outcomes[a, d], outcomes[b, c], outcomes[b, d])
+                    if len(seen) > 1:
+                        refine.add((a, b, c, d))
+
+        regions = sorted(refine)
+        steps = [max(1, step // 2) for step in steps]
+
+    return outcomes
@@ -0,0 +1,24 @@
+def bisect_boundaries(keys, size, holds):
+    # For each key, finds the first index in range(size) where a monotone condition stops holding, i.e.
+    # the condition holds for every index below the result and for none from it on (size if it always
+    # holds). All keys are probed together each round, so one round is one batch for the worker pool.
+    # holds({key: index}) returns {key: bool}.
+    lo = {key: 0 for key in keys}
+    hi = {key: size for key in keys}
+    probes = {key: 0 for key in keys}
+
+    while True:
+        active = [key for key in keys if lo[key] < hi[key]]
+        if not active:
+            break
+
+        middle = {key: (lo[key] + hi[key]) // 2 for key in active}
+        result = holds(middle)
+        for key in active:
+            probes[key] += 1
+            if result[key]:
+                lo[key] = middle[key] + 1
+            else:
+                hi[key] = middle[key]
+
+    return lo, probes
@@ -1,5 +1,8 @@
 import csv
+import os
 
+# Only for legacy single-file CSV results, appended to row by row and prone to garbled lines. Sweeps now
+# write a results directory of atomically renamed part files, which results.load_results reads as is.
 csv_filename = "20x20x20-standard-domain-number-cumulative.csv"
 clean_csv_filename = csv_filename.replace('.csv', '-clean.csv')  # Create a new filename with "-clean" suffix
 expected_fields = 13  # The expected number of fields per line
@@ -38,6 +41,10 @@ def clean_and_copy_csv(csv_filename, clean_csv_filename, expected_fields):
     return total_lines, removed_lines_count
 
 def main():
+    if not os.path.isfile(csv_filename):
+        print(f"{csv_filename} is not a legacy CSV file, results directories need no cleaning")
+        return
+
     # Remove any null bytes in the file
     remove_null_bytes(csv_filename)
 
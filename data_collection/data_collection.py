@@ -1,5 +1,12 @@
-from ship import Ship
-import pandas as pd
+import os
+import signal
+import sys
+import time
+from adaptive import adaptive_sweep, outcome
+from bisection import bisect_boundaries
+from results import ResultSink, load_results, save_table, save_trials
+from sweep import CompletedIndex, SweepRunner, sweep_points
+from trials import monte_carlo
 import numpy as np
 from tqdm import tqdm
 
@@ -10,62 +17,155 @@ CONTAINER_TYPE = "standard"
 ITERATIONS = 2
 TYPE = "domain"
 CONTROLLER = "number" # "distance" or "number"
+MODE = "grid"  # "grid" evaluates every point, "adaptive" refines only where neighbouring outcomes differ,
+               # "bisect" searches each power for the value where the majority outcome flips
+ADAPTIVE_COARSE = (8, 16)  # Initial intervals along the power and value axes in adaptive mode
 CUMULATIVE = True
+NOISE_METHOD = "direct"  # "fft" convolves the cumulative noise floor over the container lattice instead
+PATH_LOSS_CACHE = "path_loss_cache"  # Directory for the dense path-loss .npy cache of wall-counting models, None to disable
+PROCESSES = None  # Worker processes, None for one per core, 1 to run in this process
+CHUNKSIZE = None  # Points handed to a worker at a time, None to pick from the sweep size
+RESULT_FORMAT = None  # "parquet" or "csv" part files, None for parquet when pyarrow is installed
+MIN_TRIALS = None  # None runs ITERATIONS trials per point, otherwise start with this many...
+MAX_TRIALS = 64  # ...and keep doubling up to this many...
+CI_WIDTH = 0.2  # ...until the 95% interval on the point's pass probability is no wider than this
+SEED = 0  # Base seed, every (power, value, iteration) point derives its own from it
+CHECKPOINT_POINTS = 500  # Write finished points to disk after this many...
+CHECKPOINT_SECONDS = 300  # ...or this long, whichever comes first
 
 jammer_power_ranges = np.arange(-25, 25.1, 0.5)
 distance_ranges = np.arange(0, 146.1, 0.1)
 # num_nodes_ranges = list(range(0, 22))
 num_nodes_ranges = list(range(0, int(BAYS * ROWS * LAYERS / 2)))
 
-np.random.shuffle(jammer_power_ranges)
-np.random.shuffle(distance_ranges)
-np.random.shuffle(num_nodes_ranges)
-
-def save_to_csv(results, power):
-    distance = results.get('avg_min_distance_jammers', 'N/A')
-    results['power'] = power
-    results['distance'] = distance
-    status = results.get('status', 'N/A')
-
-    df = pd.DataFrame([results])
-    df = df[['power', 'distance', 'status'] + [col for col in df.columns if col not in ['power', 'distance', 'status']]]
-
-    csv_filename = f"{BAYS}x{ROWS}x{LAYERS}-{CONTAINER_TYPE}-{TYPE}-{CONTROLLER}{'-cumulative' if CUMULATIVE else ''}.csv"
-    df.to_csv(csv_filename, mode='a', index=False, header=not pd.io.common.file_exists(csv_filename))
-
-for power in tqdm(jammer_power_ranges, desc="Jammer Power"):
-    if CONTROLLER == "number":
-        for num_nodes in tqdm(num_nodes_ranges, desc="Number of Nodes", leave=False):
-            ship = Ship(bays=BAYS, rows=ROWS, layers=LAYERS)
-            ship.add_containers(":", ":", ":", container_type=CONTAINER_TYPE)
-            
-            if TYPE == "plane":
-                ship.set_n_nodes_in_plane('bays', int(BAYS / 2), num_nodes, malicious=True, jammer=True, transmit_power=power)
-            else:
-                ship.set_n_nodes(num_nodes, malicious=True, jammer=True, transmit_power=power)
-            
-            if CUMULATIVE:
-                ship.generate_container_graph_cumulative()
-            else:
-                ship.generate_container_graph()
-
-            results = ship.analyse_graph()
-            save_to_csv(results, power)
-
-    else:  # CONTROLLER == "distance"        
-        for distance in tqdm(distance_ranges, desc="Distance", leave=False):
-            ship = Ship(bays=BAYS, rows=ROWS, layers=LAYERS)
-            ship.add_containers(":", ":", ":", container_type=CONTAINER_TYPE)
-
-            if TYPE == "plane":
-                ship.set_max_nodes_in_plane('bays', int(BAYS / 2), distance, malicious=True, jammer=True, transmit_power=power)
-            else:
-                ship.set_max_nodes(distance, malicious=True, jammer=True, transmit_power=power)
-
-            if CUMULATIVE:
-                ship.generate_container_graph_cumulative()
-            else:
-                ship.generate_container_graph()
-
-            results = ship.analyse_graph()
-            save_to_csv(results, power)
+# Seeded so a restarted sweep visits the remaining points in the same order
+rng = np.random.default_rng(SEED)
+rng.shuffle(jammer_power_ranges)
+rng.shuffle(distance_ranges)
+rng.shuffle(num_nodes_ranges)
+
+results_directory = f"{BAYS}x{ROWS}x{LAYERS}-{CONTAINER_TYPE}-{TYPE}-{CONTROLLER}{'-cumulative' if CUMULATIVE else ''}"
+index_filename = os.path.join(results_directory, "completed.txt")
+
+def config():
+    return {
+        'bays': BAYS,
+        'rows': ROWS,
+        'layers': LAYERS,
+        'container_type': CONTAINER_TYPE,
+        'type': TYPE,
+        'controller': CONTROLLER,
+        'cumulative': CUMULATIVE,
+        'noise_method': NOISE_METHOD,
+        'path_loss_cache': PATH_LOSS_CACHE,
+    }
+
+def known_outcomes():
+    # Outcomes of points finished by an earlier run, so a resumed sweep can still refine or add trials around them
+    if not os.path.isdir(results_directory):
+        return {}
+    df = load_results(results_directory)
+    if 'value' not in df.columns:
+        return {}
+    rows = df[['status', 'trustset_configuration', 'num_connected_components']].to_dict('records')
+    return {key: outcome(row) for key, row in zip(zip(df['power'], df['value'], df['iteration']), rows)}
+
+if __name__ == "__main__":
+    values = num_nodes_ranges if CONTROLLER == "number" else distance_ranges
+
+    sink = ResultSink(results_directory, format=RESULT_FORMAT)
+    index = CompletedIndex(index_filename)
+
+    # Pre-emption sends SIGTERM, stop between points so what has finished is checkpointed once
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+
+    pending = []
+    last_checkpoint = time.monotonic()
+
+    def checkpoint():
+        global last_checkpoint
+        # Rows go out before their keys, so a crash in between repeats a batch rather than losing it
+        sink.flush()
+        index.add(pending)
+        pending.clear()
+        last_checkpoint = time.monotonic()
+
+    outcomes = known_outcomes()
+    summary = {}
+
+    def run(points):
+        # Evaluates the points not in the index yet, recording the outcome of each one that finishes
+        remaining = index.remaining(points)
+        if len(remaining) < len(points):
+            print(f"Resuming: {len(points) - len(remaining)} of {len(points)} points already done")
+
+        try:
+            # Workers load the ship once for the whole sweep and reuse it, only resetting behaviour per point
+            for point, results in tqdm(runner.run(remaining), total=len(remaining), desc="Sweep"):
+                sink.add(results, point)
+                pending.append(point)
+                outcomes[point[:3]] = outcome(results)
+                if len(pending) >= CHECKPOINT_POINTS or time.monotonic() - last_checkpoint >= CHECKPOINT_SECONDS:
+                    checkpoint()
+                if stopping:
+                    break
+        finally:
+            checkpoint()
+
+        if stopping:
+            sys.exit(1)
+
+    def run_cells(trials):
+        # Runs iterations 0..n-1 of each (power, value) cell and returns their outcomes
+        run([point for (power, value), n in trials.items() for point in sweep_points([power], [value], n, base_seed=SEED)])
+        return {cell: [outcomes[cell + (iteration,)] for iteration in range(n)] for cell, n in trials.items()}
+
+    def run_trials(trials):
+        return {cell: [status == "Pass" for status, _, _ in cell_outcomes] for cell, cell_outcomes in run_cells(trials).items()}
+
+    def evaluate(cells):
+        # Outcomes of each cell's trials: ITERATIONS of them, or as many as its pass-probability interval needs
+        if MIN_TRIALS is None:
+            return run_cells({cell: ITERATIONS for cell in cells})
+
+        summary.update(monte_carlo(cells, run_trials, MIN_TRIALS, MAX_TRIALS, CI_WIDTH))
+        save_trials(summary, results_directory, format=sink.format)
+        return {cell: [outcomes[cell + (iteration,)] for iteration in range(summary[cell]['trials'])] for cell in cells}
+
+    # One worker pool serves every round of the sweep
+    with SweepRunner(config(), processes=PROCESSES, chunksize=CHUNKSIZE) as runner:
+        if MODE == "grid":
+            evaluate([(power, value) for power in jammer_power_ranges.tolist() for value in np.asarray(values).tolist()])
+
+        elif MODE == "bisect":
+            powers = np.sort(jammer_power_ranges).tolist()
+            values = np.sort(values).tolist()
+
+            def majority_condition(probe):
+                # Number controller: more jammers only hurt, so bisect on "still passes". Distance controller:
+                # jammers thin out as the spacing grows, so bisect on "still fails".
+                cell_outcomes = evaluate([(power, values[i]) for power, i in probe.items()])
+                passing = {power: np.mean([status == "Pass" for status, _, _ in cell_outcomes[power, values[i]]]) >= 0.5 for power, i in probe.items()}
+                return passing if CONTROLLER == "number" else {power: not passes for power, passes in passing.items()}
+
+            boundaries, probes = bisect_boundaries(powers, len(values), majority_condition)
+            rows = [{
+                'power': power,
+                'last_before': values[boundaries[power] - 1] if boundaries[power] > 0 else np.nan,  # Last value on the starting side
+                'first_after': values[boundaries[power]] if boundaries[power] < len(values) else np.nan,  # First value past the boundary
+                'probes': probes[power],
+            } for power in powers]
+            save_table(rows, results_directory, "boundaries", format=sink.format)
+            print(f"Bisection evaluated {sum(probes.values())} of {len(powers) * len(values)} grid points")
+
+        else:  # MODE == "adaptive"
+            powers = np.sort(jammer_power_ranges).tolist()
+            values = np.sort(values).tolist()
+
+            def evaluate_indices(cells):
+                cell_outcomes = evaluate([(powers[i], values[j]) for i, j in cells])
+                return {(i, j): set(cell_outcomes[powers[i], values[j]]) for i, j in cells}
+
+            evaluated = adaptive_sweep((len(powers), len(values)), evaluate_indices, coarse=ADAPTIVE_COARSE)
+            print(f"Adaptive sweep evaluated {len(evaluated)} of {len(powers) * len(values)} grid points")
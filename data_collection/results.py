@@ -0,0 +1,163 @@
+import ast
+import glob
+import os
+import uuid
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - only needed by pandas' parquet engine
+    PARQUET = True
+except ImportError:
+    PARQUET = False
+
+FORMATS = {'parquet': '.parquet', 'csv': '.csv'}
+LEADING_COLUMNS = ['power', 'distance', 'status']
+SIZE_SEPARATOR = ';'  # Joins component sizes in CSV parts, which have no list type
+
+
+def result_row(results, point):
+    # One output row: power, distance and status first, then the analysis results as they came,
+    # then the controller value and iteration that identify the sweep point
+    power, value, iteration, _ = point
+    row = {'power': power, 'distance': results.get('avg_min_distance_jammers', 'N/A'), 'status': results.get('status', 'N/A')}
+    row.update((key, item) for key, item in results.items() if key not in row)
+
+    # Columnar formats need one type per column, so 'N/A' distances become NaN
+    for key in ('distance', 'avg_min_distance_jammers'):
+        if row[key] == 'N/A':
+            row[key] = np.nan
+
+    # Component sizes as a list column, largest first, instead of the analysis results' Component_i dict
+    sizes = sorted(row.pop('connected_components').values(), reverse=True)
+    row['component_sizes'] = sizes
+    row['largest_component'] = sizes[0] if sizes else 0
+    row['value'] = value
+    row['iteration'] = iteration
+    return row
+
+
+def write_frame(df, path, format):
+    # Written to a temporary name and renamed into place, so readers never see half a file
+    tmp = path + ".tmp"
+    if format == 'parquet':
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+class ResultSink:
+    # Buffers result rows in memory and writes each flush as its own part file in a results directory.
+    # Parts are renamed into place under a per-writer name, so several writers can share one directory.
+
+    def __init__(self, directory, format=None):
+        format = format or ('parquet' if PARQUET else 'csv')
+        if format not in FORMATS:
+            raise ValueError(f"Unknown result format: {format}")
+        if format == 'parquet' and not PARQUET:
+            raise ImportError("Parquet output needs pyarrow, use format='csv' instead.")
+
+        self.directory = directory
+        self.format = format
+        self.writer = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.parts = 0
+        self.rows = []
+        os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, results, point):
+        self.rows.append(result_row(results, point))
+
+    def flush(self):
+        if not self.rows:
+            return None
+
+        df = pd.DataFrame(self.rows)
+        if self.format == 'csv':
+            df['component_sizes'] = [SIZE_SEPARATOR.join(map(str, sizes)) for sizes in df['component_sizes']]
+        path = os.path.join(self.directory, f"part-{self.writer}-{self.parts:05d}{FORMATS[self.format]}")
+        write_frame(df, path, self.format)
+
+        self.parts += 1
+        self.rows = []
+        return path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+def parse_sizes(text):
+    if not isinstance(text, str):
+        return []
+    return [int(size) for size in text.split(SIZE_SEPARATOR) if size]
+
+
+def parse_legacy_components(text):
+    # Older results stored str() of the Component_i dict, which can only be read back row by row
+    try:
+        return sorted((int(size) for size in ast.literal_eval(text).values()), reverse=True)
+    except (ValueError, SyntaxError, AttributeError):
+        return []
+
+
+def read_legacy_csv(path):
+    df = pd.read_csv(path, on_bad_lines='skip')
+    if 'connected_components' in df.columns:
+        df['component_sizes'] = df.pop('connected_components').map(parse_legacy_components)
+        df['largest_component'] = [sizes[0] if sizes else 0 for sizes in df['component_sizes']]
+    return df
+
+
+def load_results(path):
+    # Reads a results directory written by ResultSink, or a legacy single CSV file
+    if os.path.isfile(path):
+        return read_legacy_csv(path)
+
+    frames = []
+    for part in sorted(glob.glob(os.path.join(path, "part-*"))):
+        if part.endswith(FORMATS['parquet']):
+            frames.append(pd.read_parquet(part))
+        elif part.endswith(FORMATS['csv']):
+            df = pd.read_csv(part, dtype={'component_sizes': str})
+            df['component_sizes'] = df['component_sizes'].map(parse_sizes)
+            frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=LEADING_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def save_table(rows, directory, name, format='csv'):
+    # Summary tables that are rewritten as a whole, e.g. trials or boundaries, next to the result parts
+    write_frame(pd.DataFrame(rows), os.path.join(directory, name + FORMATS[format]), format)
+
+
+def load_table(directory, name):
+    for format, extension in FORMATS.items():
+        path = os.path.join(directory, name + extension)
+        if os.path.exists(path):
+            return pd.read_parquet(path) if format == 'parquet' else pd.read_csv(path)
+    return None
+
+
+def save_trials(summary, directory, format='csv'):
+    # Per (power, value) trial counts and pass-probability intervals from a Monte-Carlo sweep
+    rows = [{'power': power, 'value': value, **stats} for (power, value), stats in summary.items()]
+    save_table(rows, directory, "trials", format)
+
+
+def load_trials(directory):
+    return load_table(directory, "trials")
+
+
+def small_component_nodes(df, fraction):
+    # Per row, the number of nodes in components smaller than fraction of total_nodes
+    sizes = pd.to_numeric(df['component_sizes'].explode(), errors='coerce')
+    limit = (fraction * df['total_nodes']).reindex(sizes.index)
+    return sizes[sizes < limit].groupby(level=0).sum().reindex(df.index, fill_value=0)
@@ -0,0 +1,169 @@
+import os
+import signal
+import numpy as np
+from multiprocessing import Pool
+from ship import Ship
+
+# Ship owned by each worker process, built once by _init_worker and reused for every point
+_ship = None
+_config = None
+
+
+def point_seed(base_seed, power, value, iteration):
+    # Seed depends only on the point itself, so results do not change with worker count or scheduling order
+    key = np.array([power, value], dtype=np.float64).view(np.uint64).tolist()
+    return np.random.SeedSequence([base_seed, *key, int(iteration)])
+
+
+def point_key(point):
+    # Text key identifying a finished point in the on-disk index
+    power, value, iteration, seed = point
+    return f"{float(power)!r},{value!r},{iteration},{seed.generate_state(1)[0]}"
+
+
+class CompletedIndex:
+    # Append-only file of finished point keys, so an interrupted sweep can skip them on restart
+
+    def __init__(self, path):
+        self.path = path
+        self.keys = set()
+        if os.path.exists(path):
+            with open(path) as file:
+                # A line cut short by a crash has no newline and is treated as not finished
+                self.keys = {line[:-1] for line in file if line.endswith("\n")}
+
+    def __contains__(self, point):
+        return point_key(point) in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def remaining(self, points):
+        return [point for point in points if point not in self]
+
+    def add(self, points):
+        keys = [point_key(point) for point in points]
+        if not keys:
+            return
+        with open(self.path, 'a') as file:
+            file.write("".join(key + "\n" for key in keys))
+            file.flush()
+            os.fsync(file.fileno())
+        self.keys.update(keys)
+
+
+def sweep_points(powers, values, iterations, base_seed=0):
+    for power in powers:
+        for value in values:
+            # Plain Python numbers, so keys and result columns do not depend on how the ranges were built
+            value = value.item() if isinstance(value, np.generic) else value
+            for iteration in range(iterations):
+                yield float(power), value, iteration, point_seed(base_seed, power, value, iteration)
+
+
+def build_ship(config):
+    ship = Ship(bays=config['bays'], rows=config['rows'], layers=config['layers'])
+    ship.add_containers(":", ":", ":", container_type=config['container_type'])
+    if config.get('path_loss_cache'):
+        ship.enable_path_loss_cache(config['path_loss_cache'])
+    return ship
+
+
+def _setup_worker(config):
+    global _ship, _config
+    _config = config
+    _ship = build_ship(config)
+
+
+def _init_worker(config):
+    # Pool children only. Forked workers inherit the parent's SIGTERM handler, which only flags the parent
+    # to stop after the current result and write a checkpoint; workers take the default action and exit
+    # straight away. SweepRunner forks them with SIGTERM blocked, so it is delivered only from here on.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})
+    _setup_worker(config)
+
+
+def evaluate_point(ship, config, power, value, seed):
+    ship.seed(seed)
+    ship.reset_behaviour()
+
+    plane = config['type'] == "plane"
+    index = int(config['bays'] / 2)
+    if config['controller'] == "number":
+        if plane:
+            ship.set_n_nodes_in_plane('bays', index, value, malicious=True, jammer=True, transmit_power=power)
+        else:
+            ship.set_n_nodes(value, malicious=True, jammer=True, transmit_power=power)
+    else:  # "distance"
+        if plane:
+            ship.set_max_nodes_in_plane('bays', index, value, malicious=True, jammer=True, transmit_power=power)
+        else:
+            ship.set_max_nodes(value, malicious=True, jammer=True, transmit_power=power)
+
+    return ship.evaluate(cumulative=config['cumulative'], noise_method=config.get('noise_method', 'direct'))
+
+
+def _run_point(point):
+    power, value, _, seed = point
+    return point, evaluate_point(_ship, _config, power, value, seed)
+
+
+class SweepRunner:
+    # One worker pool for a whole sweep: each worker builds its ship once, and every round of points
+    # (grid, adaptive refinement, Monte-Carlo doubling, bisection) is fed to the same workers.
+    # processes=1 runs the points in this process instead.
+
+    def __init__(self, config, processes=None, chunksize=None):
+        self.config = config
+        self.processes = processes or os.cpu_count()
+        self.chunksize = chunksize
+        self.pool = None
+
+    def __enter__(self):
+        if self.processes == 1:
+            # The parent keeps its own SIGTERM handler
+            _setup_worker(self.config)
+            return self
+
+        # A worker terminated before its initializer ran would otherwise run the parent's handler and
+        # never exit, hanging terminate(). Workers, and the pool's threads that fork replacements, are
+        # started with SIGTERM blocked and unblock it in _init_worker once the default action is back.
+        blocked = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+        try:
+            self.pool = Pool(self.processes, initializer=_init_worker, initargs=(self.config,))
+        finally:
+            signal.pthread_sigmask(signal.SIG_SETMASK, blocked)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def run(self, points):
+        # Yields (point, results) per point as workers finish them, in no particular order
+        points = list(points)
+        if not points:
+            return
+
+        if self.pool is None:
+            for point in points:
+                yield _run_point(point)
+            return
+
+        chunksize = self.chunksize
+        if chunksize is None:
+            # A few chunks per worker keeps the queue busy without starving the tail of the round
+            chunksize = max(1, len(points) // (self.processes * 8))
+        yield from self.pool.imap_unordered(_run_point, points, chunksize=chunksize)
+
+
+def run_sweep(config, points, processes=None, chunksize=None):
+    # Single round of points on a pool of its own, see SweepRunner for sweeps with several rounds
+    points = list(points)
+    if not points:
+        return
+    with SweepRunner(config, processes, chunksize) as runner:
+        yield from runner.run(points)
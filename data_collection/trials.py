@@ -0,0 +1,40 @@
+import numpy as np
+
+Z = 1.96  # 95% confidence
+
+
+def wilson_interval(passes, trials, z=Z):
+    # Wilson score interval on the pass probability, well behaved at 0 or all passes and small trial counts
+    passes = np.asarray(passes, dtype=float)
+    trials = np.asarray(trials, dtype=float)
+    p = passes / trials
+    denominator = 1 + z ** 2 / trials
+    centre = (p + z ** 2 / (2 * trials)) / denominator
+    half = z / denominator * np.sqrt(p * (1 - p) / trials + z ** 2 / (4 * trials ** 2))
+    return centre - half, centre + half
+
+
+def monte_carlo(cells, run, min_trials, max_trials, max_width, z=Z):
+    # Runs random trials per cell until the interval on its pass probability is no wider than max_width,
+    # or max_trials is reached. Unsettled cells double their trial count each round, so all cells of a
+    # round can go to the worker pool together. run({cell: n}) runs iterations 0..n-1 of each cell and
+    # returns {cell: list of pass booleans}.
+    trials = {cell: min(min_trials, max_trials) for cell in cells}
+    summary = {}
+    active = list(cells)
+
+    while active:
+        passes = run({cell: trials[cell] for cell in active})
+        counts = np.array([sum(passes[cell]) for cell in active])
+        totals = np.array([len(passes[cell]) for cell in active])
+        low, high = wilson_interval(counts, totals, z)
+
+        unsettled = []
+        for cell, count, total, lo, hi in zip(active, counts.tolist(), totals.tolist(), low.tolist(), high.tolist()):
+            summary[cell] = {'trials': total, 'passes': count, 'pass_probability': count / total, 'ci_low': lo, 'ci_high': hi}
+            if hi - lo > max_width and trials[cell] < max_trials:
+                trials[cell] = min(max_trials, 2 * trials[cell])
+                unsettled.append(cell)
+        active = unsettled
+
+    return summary
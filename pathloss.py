@@ -1,23 +1,23 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
+from ship_class.propagation import get_model
 
 class SignalStrengthModel:
     def __init__(self, left, right, resolution):
         self.frequency = 2.4e9
-        self.speed_of_light = 3e8
+        self.model = get_model('free-space', {'frequency': self.frequency})
         self.distances = np.linspace(left, right, resolution)
         self.noise_radios = []
         self.network_radios = []
 
     def free_space_path_loss(self, distance):
-        return 20 * np.log10(distance) + 20 * np.log10(self.frequency) - 20 * np.log10(self.speed_of_light)
+        return self.model.path_loss(distance)
 
     def calculate_path_loss(self, radio_position, power_dBm):
         relative_distances = np.abs(self.distances - radio_position)
         relative_distances = np.clip(relative_distances, 0.1, None)
-        path_loss = power_dBm - self.free_space_path_loss(relative_distances)
-        return path_loss
+        return self.model.received_power(relative_distances, power_dBm, None)
 
     def add_noise_radio(self, position, power_dBm):
         self.noise_radios.append({"position": position, "power": power_dBm})
@@ -0,0 +1,90 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from neighbours import nearest_distances
+
+
+def components(num_nodes, u, v):
+    # Number of isolated nodes, and the sizes of the components formed by the rest ordered by lowest node index
+    degree = np.bincount(u, minlength=num_nodes) + np.bincount(v, minlength=num_nodes)
+    connected = degree > 0
+
+    adjacency = coo_matrix((np.ones(len(u), dtype=bool), (u, v)), shape=(num_nodes, num_nodes))
+    _, labels = connected_components(adjacency, directed=False)
+
+    _, first_node, sizes = np.unique(labels[connected], return_index=True, return_counts=True)
+    return int(np.count_nonzero(~connected)), sizes[np.argsort(first_node)].tolist()
+
+
+def summarise(total_nodes, num_malicious, num_jamming, num_unconnected, sizes, avg_min_distance='N/A', verbose=False):
+    num_honest = total_nodes - num_malicious
+    num_connected = total_nodes - num_unconnected
+    num_connected_components = len(sizes)
+
+    B = total_nodes - 1 - 3 * num_malicious
+    trustset_configuration = B >= (num_unconnected - num_jamming)
+
+    status = "Pass" if trustset_configuration and num_connected_components == 1 else "Fail"
+
+    analysis_results = {
+        'total_nodes': total_nodes,
+        'num_honest': num_honest,
+        'num_jamming': num_jamming,
+        'num_unconnected': num_unconnected,
+        'num_connected': num_connected,
+        'buffer_margin': B,
+        'trustset_configuration': trustset_configuration,
+        'num_connected_components': num_connected_components,
+        'connected_components': {f'Component_{i+1}': size for i, size in enumerate(sizes)},
+        'avg_min_distance_jammers': avg_min_distance,
+        'status': status
+    }
+
+    if verbose:
+        print(f"\nTotal nodes             : {total_nodes}")
+        print(f"  Honest Nodes          : {num_honest}")
+        print(f"  Jamming Nodes         : {num_jamming}\n")
+        print(f"Total disconnected      : {num_unconnected}")
+        print(f"  Potential Honest      : {num_unconnected - num_jamming}")
+        print(f"  Buffer Margin         : {B}\n")
+        print(f"Trustset Configuration  : {trustset_configuration}\n")
+        print(f"Components              : {num_connected_components}")
+        if num_connected_components > 1:
+            for i, size in enumerate(sizes):
+                print(f"  Component {i + 1:<12}: {size} nodes")
+            print()
+        else:
+            print()
+
+        if avg_min_distance != 'N/A':
+            print(f"Average Distance        : {avg_min_distance:.2f}\n")
+        else:
+            print(f"Average Distance        : N/A\n")
+
+        print(f"Status                  : {status}\n")
+
+    return analysis_results
+
+
+def avg_min_jammer_distance(positions):
+    if len(positions) < 2:
+        return 'N/A'
+    min_distances = nearest_distances(positions).tolist()
+    return sum(min_distances) / len(min_distances)
+
+
+def analyse_edges(nodes, u, v, verbose=False):
+    # Same results as Ship.analyse_graph, computed from layout node arrays and an integer edge list
+    total_nodes = len(nodes['slot'])
+    num_unconnected, sizes = components(total_nodes, u, v)
+
+    jammers = nodes['jammer']
+    return summarise(
+        total_nodes,
+        int(np.count_nonzero(nodes['malicious'])),
+        int(np.count_nonzero(jammers)),
+        num_unconnected,
+        sizes,
+        avg_min_jammer_distance(nodes['pos'][jammers]),
+        verbose=verbose,
+    )
@@ -0,0 +1,67 @@
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix, triu
+from connectivity import analyse_edges
+
+
+# Layout node arrays stored alongside the adjacency on disk
+NODE_FIELDS = ('slot', 'cell', 'kind', 'pos', 'transmit_power', 'malicious', 'jammer')
+
+
+class SparseGraph:
+    # Ship connectivity graph as a symmetric CSR adjacency over integer node ids, i.e. indices into the
+    # layout.nodes() arrays kept in self.nodes. adjacency.data holds each link's signal strength (dBm)
+    # as float32, so a graph costs about 16 bytes per edge instead of a networkx attribute dict.
+
+    def __init__(self, nodes, adjacency):
+        self.nodes = nodes
+        self.adjacency = adjacency
+
+    @classmethod
+    def from_edges(cls, nodes, u, v, signal_strength):
+        num_nodes = len(nodes['slot'])
+        # int32 ids are plenty for a ship and halve the index memory while building
+        rows, cols = np.concatenate([u, v], dtype=np.int32), np.concatenate([v, u], dtype=np.int32)
+        signal_strength = np.concatenate([signal_strength, signal_strength]).astype(np.float32)
+        adjacency = coo_matrix((signal_strength, (rows, cols)), shape=(num_nodes, num_nodes)).tocsr()
+        return cls(nodes, adjacency)
+
+    @property
+    def num_nodes(self):
+        return self.adjacency.shape[0]
+
+    @property
+    def num_edges(self):
+        return self.adjacency.nnz // 2
+
+    def degree(self):
+        return np.diff(self.adjacency.indptr)
+
+    def edges(self):
+        # (u, v, signal_strength) arrays with u < v, one entry per link
+        upper = triu(self.adjacency, k=1).tocoo()
+        return upper.row, upper.col, upper.data
+
+    def analyse(self, verbose=False):
+        u, v, _ = self.edges()
+        return analyse_edges(self.nodes, u, v, verbose=verbose)
+
+    def save(self, filename):
+        # Compressed .npz with the CSR arrays and node arrays, readable without pickle
+        adjacency = self.adjacency
+        np.savez_compressed(
+            filename,
+            indptr=adjacency.indptr,
+            indices=adjacency.indices,
+            signal_strength=adjacency.data,
+            id=np.array(self.nodes['id']),
+            **{field: self.nodes[field] for field in NODE_FIELDS}
+        )
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as data:
+            nodes = {field: data[field] for field in NODE_FIELDS}
+            nodes['id'] = data['id'].tolist()
+            num_nodes = len(nodes['slot'])
+            adjacency = csr_matrix((data['signal_strength'], data['indices'], data['indptr']), shape=(num_nodes, num_nodes))
+        return cls(nodes, adjacency)
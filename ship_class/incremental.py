@@ -0,0 +1,206 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import minimum_spanning_tree
+from connectivity import summarise
+from neighbours import nearest_distances, pairwise_distances
+
+
+# Death time of links no jammer ever drowns
+NEVER = np.iinfo(np.int64).max
+
+
+class IncrementalJammerEvaluator:
+    # Turns honest containers into jammers one at a time and gives the results Ship.evaluate would have
+    # returned after every step, without touching the ship's layout. Jamming only ever grows, so every
+    # link dies at most once: a step adds the new jammer's power to the noise at every node in O(n) and
+    # retires only the links whose received signal it now drowns. curve() replays those death times
+    # backwards through a union-find to get the components at every step.
+
+    def __init__(self, ship, cumulative=True, dtype=np.float64):
+        self.ship = ship
+        self.cumulative = cumulative
+        self.dtype = dtype
+        self.path_loss = ship.path_loss_matrix()
+
+        nodes = ship.layout.nodes()
+        self.nodes = nodes
+        self.num_nodes = len(nodes['slot'])
+        self.malicious = nodes['malicious'].copy()
+        self.num_malicious = int(np.count_nonzero(self.malicious))
+        self.num_jamming = int(np.count_nonzero(nodes['jammer']))
+        self.step = 0
+
+        # Jamming heard at every node: summed linear power when cumulative, strongest jammer (dBm) otherwise
+        honest = np.flatnonzero(~self.malicious)
+        if cumulative:
+            noise_floor = ship._noise_floor(nodes, dtype)
+            self.noise = np.zeros(self.num_nodes, dtype=dtype)
+            self.noise[honest] = 10 ** (noise_floor / 10)
+            self.u, self.v, s_uv, s_vu = ship._build_edges(nodes, noise_floor=noise_floor, directional=True)
+        else:
+            max_jamming = ship._max_jamming(nodes, dtype)
+            self.noise = np.full(self.num_nodes, -np.inf, dtype=dtype)
+            self.noise[honest] = max_jamming
+            self.u, self.v, s_uv, s_vu = ship._build_edges(nodes, max_jamming=max_jamming, directional=True)
+        self.death = np.full(len(self.u), NEVER, dtype=np.int64)
+
+        # Each link has an end at both nodes, holding the signal that node receives over it. Ends are
+        # ranked by received signal across the whole ship and grouped by node in rank order, so the ends a
+        # noise level drowns at a node are a prefix of that node's run, found with one searchsorted.
+        ends = np.concatenate([self.v, self.u])
+        received = np.concatenate([s_uv, s_vu])
+        order = np.argsort(received)
+        self.received = received[order]
+        rank = np.empty(len(received), dtype=np.int64)
+        rank[order] = np.arange(len(received))
+
+        # A stable sort by node keeps rank order within each node, and is a radix sort for small ints
+        node_type = np.int16 if self.num_nodes <= np.iinfo(np.int16).max else np.int64
+        order = order[np.argsort(ends[order].astype(node_type), kind='stable')]
+
+        self.width = max(len(received), 1)
+        self.key = ends[order].astype(np.int64) * self.width + rank[order]
+        self.link = order % max(len(self.u), 1)
+        # Signal at each end in that order, with a sentinel for nodes whose ends are all drowned
+        self.end_received = np.append(received[order], np.inf)
+
+        bounds = np.searchsorted(self.key, np.arange(self.num_nodes + 1, dtype=np.int64) * self.width)
+        self.start, self.stop = bounds[:-1], bounds[1:]
+        self.next = self.start.copy()  # First end at each node not drowned yet
+
+        jammer_positions = nodes['pos'][nodes['jammer']]
+        self.jammer_positions = jammer_positions
+        self.nearest = nearest_distances(jammer_positions) if len(jammer_positions) > 1 else np.full(len(jammer_positions), np.inf)
+        self.avg_min_distance = [self._avg_min_distance()]
+
+    def _avg_min_distance(self):
+        if len(self.nearest) < 2:
+            return 'N/A'
+        return sum(self.nearest.tolist()) / len(self.nearest)
+
+    def _jamming_power(self, node, transmit_power):
+        # Power (dBm) of a jammer at node heard at every node
+        if self.path_loss is not None:
+            return (transmit_power - self.path_loss[node]).astype(self.dtype, copy=False)
+
+        positions = self.nodes['pos']
+        distances = pairwise_distances(positions[node:node + 1], positions)[0]
+        walls = self.ship._walls(node, np.arange(self.num_nodes))
+        with np.errstate(divide='ignore'):
+            power = self.ship.calculate_signal_strength(distances, transmit_power, self.ship.model, self.ship.model_params, walls=walls)
+        return np.asarray(power, dtype=self.dtype)
+
+    def _retire(self, ends):
+        links = self.link[ends]
+        self.death[links] = np.minimum(self.death[links], self.step)
+
+    def add_jammer(self, node, transmit_power):
+        # Makes the honest container at index node (in layout.nodes() order) a jammer
+        if self.malicious[node]:
+            raise ValueError(f"Container {self.nodes['id'][node]} is already malicious.")
+
+        self.step += 1
+        self.malicious[node] = True
+        self.num_malicious += 1
+        self.num_jamming += 1
+
+        # A jammer keeps none of its links
+        self._retire(np.arange(self.next[node], self.stop[node]))
+        self.next[node] = self.stop[node]
+
+        jamming = self._jamming_power(node, transmit_power)
+        weakest = np.where(self.next < self.stop, self.end_received[self.next], np.inf)
+        if self.cumulative:
+            self.noise += 10 ** (jamming / 10)
+            with np.errstate(divide='ignore'):
+                level = 10 * np.log10(self.noise)
+            # Links need signal > noise, so everything received at or below it goes
+            changed = np.flatnonzero(weakest <= level)
+            drowned = np.searchsorted(self.received, level[changed], side='right')
+        else:
+            self.noise = np.maximum(self.noise, jamming)
+            # Links need signal >= the strongest jammer, so only what is received below it goes
+            changed = np.flatnonzero(weakest < self.noise)
+            drowned = np.searchsorted(self.received, self.noise[changed], side='left')
+
+        if len(changed):
+            new_next = np.searchsorted(self.key, changed.astype(np.int64) * self.width + drowned)
+            lengths = new_next - self.next[changed]
+            offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            self._retire(np.repeat(self.next[changed], lengths) + offsets)
+            self.next[changed] = new_next
+
+        position = self.nodes['pos'][node]
+        if len(self.jammer_positions):
+            distances = pairwise_distances(position[None], self.jammer_positions)[0]
+            self.nearest = np.append(np.minimum(self.nearest, distances), distances.min())
+        else:
+            self.nearest = np.full(1, np.inf)
+        self.jammer_positions = np.vstack([self.jammer_positions, position])
+        self.avg_min_distance.append(self._avg_min_distance())
+
+    def add_jammer_cell(self, x, y, z, transmit_power):
+        # Same slot choice as Ship.set_behaviour; returns the node index, or None if the cell has no
+        # container to take over or it is malicious already
+        layout = self.ship.layout
+        slot = int(layout.cell_slots(x, y, z, self.ship.rng))
+        if slot < 0:
+            return None
+
+        node = int(np.searchsorted(self.nodes['slot'], np.ravel_multi_index((x, y, z, slot), layout.occupied.shape)))
+        if self.malicious[node]:
+            return None
+
+        self.add_jammer(node, transmit_power)
+        return node
+
+    def curve(self, verbose=False):
+        # Analysis results after each of steps 0..step, as returned by Ship.analyse_graph
+        steps = self.step
+        death = np.minimum(self.death, steps + 1)
+
+        # Components at every step match those of a maximum spanning forest over death times, cut at
+        # the same step, so only its n - 1 links have to go through the union-find
+        forest = minimum_spanning_tree(coo_matrix(((steps + 2) - death, (self.u, self.v)), shape=(self.num_nodes, self.num_nodes)).tocsr()).tocoo()
+        forest_death = (steps + 2) - forest.data.astype(np.int64)
+        order = np.argsort(-forest_death, kind='stable')
+        forest_u, forest_v, forest_death = forest.row[order].tolist(), forest.col[order].tolist(), forest_death[order].tolist()
+
+        parent = list(range(self.num_nodes))
+
+        def find(a):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            return a
+
+        components = {}  # Root -> (lowest node index, size), for components of two or more nodes
+        connected = 0
+        added = 0
+        results = [None] * (steps + 1)
+        for step in range(steps, -1, -1):
+            # Bring back the links still alive at this step
+            while added < len(forest_death) and forest_death[added] > step:
+                a, b = find(forest_u[added]), find(forest_v[added])
+                low_a, size_a = components.pop(a, (a, 1))
+                low_b, size_b = components.pop(b, (b, 1))
+                connected += (size_a == 1) + (size_b == 1)
+                if size_a < size_b:
+                    a, b = b, a
+                parent[b] = a
+                components[a] = (min(low_a, low_b), size_a + size_b)
+                added += 1
+
+            sizes = [size for _, size in sorted(components.values())]
+            base = self.step - step
+            results[step] = summarise(
+                self.num_nodes,
+                self.num_malicious - base,
+                self.num_jamming - base,
+                self.num_nodes - connected,
+                sizes,
+                self.avg_min_distance[step],
+                verbose=verbose,
+            )
+
+        return results
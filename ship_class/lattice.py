@@ -0,0 +1,58 @@
+import numpy as np
+from scipy.signal import fftconvolve
+from neighbours import pairwise_distances
+
+
+class LatticePathLoss:
+    # Path loss between containers, exploiting that they sit on the ship's regular lattice: a pair's
+    # distance only depends on its displacement, in quarter cells along the bays and whole cells across
+    # them. The loss is computed once per signed displacement, about 8 * bays * rows * layers of them,
+    # and gathered by index for every pair. Each node gets a code such that code[a] - code[b] indexes the table at the
+    # a - b displacement, so a lookup costs one subtraction. Indexed like the dense (n, n) matrix:
+    # loss[a, b] for broadcastable index arrays (e.g. np.ix_) and loss[a] for whole rows.
+
+    def __init__(self, layout, path_loss):
+        # path_loss maps an array of distances (m) to path loss (dB)
+        geometry = layout.geometry()
+        quarter, cells = geometry['quarter'], geometry['cell']
+        self.num_nodes = len(quarter)
+        self.shape = (self.num_nodes, self.num_nodes)
+
+        # Signed displacements from -extent to +extent along each axis
+        extent = np.array([4 * layout.bays, layout.rows - 1, layout.layers - 1])
+        size = 2 * extent + 1
+        displacements = np.indices(size).reshape(3, -1).T - extent
+        steps = np.array([layout.cell_length / 4, layout.cell_width, layout.cell_height])
+        distances = pairwise_distances(displacements * steps, np.zeros((1, 3)))[:, 0]
+        with np.errstate(divide='ignore'):
+            self.table = np.asarray(path_loss(distances), dtype=float)
+
+        strides = np.array([size[1] * size[2], size[2], 1])
+        self.size = size
+        self.extent = extent
+        self.coordinates = np.stack([quarter, cells[:, 1], cells[:, 2]], axis=1)
+        self.code = self.coordinates @ strides
+        self._kernel = None
+
+    def __getitem__(self, index):
+        if not isinstance(index, tuple):
+            index = (index, slice(None))
+        a, b = (self.code[i] for i in index)
+        # Zero displacement sits at the centre of the table
+        return self.table[a - b + self.table.size // 2]
+
+    def received_sum(self, sources, power, targets):
+        # Summed linear power received at each target node from transmitters at the source nodes with
+        # the given linear power. The sum over sources is a convolution of the transmit power on the
+        # lattice with the linear path gain, so it is done as one FFT whatever the number of sources.
+        if self._kernel is None:
+            loss = self.table.reshape(self.size).copy()
+            # A target never shares a lattice point with a source, and the loss there is -inf anyway
+            loss[tuple(self.extent)] = np.inf
+            self._kernel = 10 ** (-loss / 10)
+
+        grid = np.zeros(self.extent + 1)
+        np.add.at(grid, tuple(self.coordinates[sources].T), power)
+        received = fftconvolve(grid, self._kernel, mode='same')
+        # Round-off can leave tiny negative sums where almost nothing is received
+        return np.maximum(received[tuple(self.coordinates[targets].T)], 0)
@@ -0,0 +1,188 @@
+import hashlib
+import numpy as np
+from container import TRANSMIT_POWER
+
+
+STANDARD = 0
+SMALL_FRONT = 1
+SMALL_BACK = 2
+
+SLOT_NAMES = ('standard', 'small_front', 'small_back')
+SLOT_PREFIXES = ('C', 'F', 'B')
+
+
+class ShipLayout:
+    # Structure-of-arrays view of every container slot on the ship, indexed [bay, row, layer, slot]
+
+    def __init__(self, bays, rows, layers, cell_size=(12, 3, 5)):
+        self.bays = bays
+        self.rows = rows
+        self.layers = layers
+        self.cell_length, self.cell_width, self.cell_height = cell_size
+
+        shape = (bays, rows, layers, len(SLOT_NAMES))
+        self.occupied = np.zeros(shape, dtype=bool)
+        self.transmit_power = np.full(shape, TRANSMIT_POWER, dtype=float)
+        self.malicious = np.zeros(shape, dtype=bool)
+        self.jammer = np.zeros(shape, dtype=bool)
+
+        # Bumped whenever containers are added so geometry derived from the layout can be cached
+        self.version = 0
+        self._geometry = None
+
+    def can_place(self, x, y, z, slot):
+        occupied = self.occupied[x, y, z]
+        if slot == STANDARD:
+            return not occupied.any()
+        return not occupied[STANDARD] and not occupied[slot]
+
+    def place(self, x, y, z, slot, transmit_power=TRANSMIT_POWER, malicious=False, jammer=False):
+        if not self.can_place(x, y, z, slot):
+            return False
+
+        self.occupied[x, y, z, slot] = True
+        self.transmit_power[x, y, z, slot] = transmit_power
+        self.malicious[x, y, z, slot] = malicious
+        self.jammer[x, y, z, slot] = jammer
+        self.version += 1
+        return True
+
+    def fill(self, x_range, y_range, z_range, container_type):
+        cells = np.ix_(x_range, y_range, z_range)
+        occupied = self.occupied[cells]
+
+        if container_type == 'standard':
+            slots = [STANDARD]
+            free = [~occupied.any(axis=-1)]
+        elif container_type == 'small':
+            slots = [SMALL_FRONT, SMALL_BACK]
+            free = [~occupied[..., STANDARD] & ~occupied[..., slot] for slot in slots]
+        else:
+            raise ValueError("Unknown container type.")
+
+        for slot, placed in zip(slots, free):
+            occupied[..., slot] |= placed
+
+        self.occupied[cells] = occupied
+        self.version += 1
+
+    def set_behaviour(self, x, y, z, slot, malicious=False, jammer=False, transmit_power=TRANSMIT_POWER):
+        # Writes behaviour to exact slots; indices may be arrays, with values broadcast against them
+        self.malicious[x, y, z, slot] = malicious
+        self.jammer[x, y, z, slot] = jammer
+        self.transmit_power[x, y, z, slot] = transmit_power
+
+    def cell_slots(self, x, y, z, rng):
+        # Slot that behaviour set on a cell applies to: the standard container if there is one, otherwise
+        # a random half of a fully loaded small-container cell, and -1 for partially loaded cells
+        x, y, z = np.broadcast_arrays(x, y, z)
+        occupied = self.occupied[x, y, z]
+        halves = SMALL_FRONT + rng.integers(0, 2, size=x.shape)
+        return np.where(occupied[..., STANDARD], STANDARD, np.where(occupied[..., SMALL_FRONT] & occupied[..., SMALL_BACK], halves, -1))
+
+    def set_cell_behaviour(self, x, y, z, rng, malicious=False, jammer=False, transmit_power=TRANSMIT_POWER):
+        # Bulk set_behaviour over cell index arrays, following cell_slots
+        x, y, z = np.broadcast_arrays(x, y, z)
+        slot = self.cell_slots(x, y, z, rng)
+
+        keep = slot >= 0
+        self.set_behaviour(
+            x[keep], y[keep], z[keep], slot[keep],
+            malicious=np.broadcast_to(malicious, x.shape)[keep],
+            jammer=np.broadcast_to(jammer, x.shape)[keep],
+            transmit_power=np.broadcast_to(transmit_power, x.shape)[keep],
+        )
+
+    def reset(self):
+        self.transmit_power.fill(TRANSMIT_POWER)
+        self.malicious.fill(False)
+        self.jammer.fill(False)
+
+    def snapshot(self):
+        return self.transmit_power.copy(), self.malicious.copy(), self.jammer.copy()
+
+    def restore(self, snapshot):
+        transmit_power, malicious, jammer = snapshot
+        np.copyto(self.transmit_power, transmit_power)
+        np.copyto(self.malicious, malicious)
+        np.copyto(self.jammer, jammer)
+
+    def signature(self):
+        # Short description of what is loaded, used to key on-disk caches
+        if self.occupied[..., STANDARD].all():
+            return 'standard'
+        if self.occupied[..., SMALL_FRONT:].all():
+            return 'small'
+        return 'mixed-' + hashlib.sha1(np.packbits(self.occupied).tobytes()).hexdigest()[:12]
+
+    def geometry(self):
+        # Behaviour-independent node arrays, rebuilt only when containers are added
+        if self._geometry is not None and self._geometry['version'] == self.version:
+            return self._geometry
+
+        slots = np.flatnonzero(self.occupied)
+        x, y, z, kind = np.unravel_index(slots, self.occupied.shape)
+
+        offsets = np.array([0, -self.cell_length / 4, self.cell_length / 4])
+        positions = np.stack([
+            x * self.cell_length + self.cell_length / 2 + offsets[kind],
+            y * self.cell_width + self.cell_width / 2,
+            z * self.cell_height + self.cell_height / 2,
+        ], axis=1).astype(float)
+
+        cells = np.stack([x, y, z], axis=1)
+        ids = [f"{SLOT_PREFIXES[k]}({i},{j},{l})" for (i, j, l), k in zip(cells.tolist(), kind.tolist())]
+
+        # Position along the bays in quarter cells: front half, standard, back half at 4x + 1, 2, 3
+        quarter = 4 * x + np.array([2, 1, 3])[kind]
+
+        # Every cell holds a standard container or both small halves
+        full = self.occupied[..., STANDARD] | (self.occupied[..., SMALL_FRONT] & self.occupied[..., SMALL_BACK])
+
+        # Fraction of each bay's loaded cells split into two small containers, summed up to each bay
+        loaded = self.occupied.any(axis=-1).sum(axis=(1, 2))
+        split = (self.occupied[..., SMALL_FRONT] | self.occupied[..., SMALL_BACK]).sum(axis=(1, 2))
+        split_prefix = np.concatenate([[0], np.cumsum(split / np.maximum(loaded, 1))])
+
+        self._geometry = {
+            'version': self.version,
+            'slot': slots,
+            'cell': cells,
+            'kind': kind,
+            'pos': positions,
+            'id': ids,
+            'quarter': quarter,
+            'split_prefix': split_prefix,
+            'fully_loaded': bool(full.all()),
+        }
+        return self._geometry
+
+    def walls_between(self, a, b):
+        # Container walls a straight link between nodes a and b (broadcastable index arrays) passes through.
+        # Every compartment boundary it crosses is two walls, one of each neighbour: one boundary per step in
+        # cell index along each axis, plus the splits between small-container halves it passes along the
+        # bays, counted with the share of split cells in each bay rather than cell by cell. Boundaries are
+        # only all real walls in a fully loaded stack, so other layouts are refused rather than charged for
+        # walls of empty cells.
+        geometry = self.geometry()
+        if not geometry['fully_loaded']:
+            raise ValueError("Wall counts need every cell loaded with a standard container or both small halves.")
+        cells, quarter, split_prefix = geometry['cell'], geometry['quarter'], geometry['split_prefix']
+        boundaries = np.abs(cells[a] - cells[b]).sum(axis=-1)
+
+        # Splits sit at quarter 4c + 2 in bay c, count those strictly between the two ends
+        near, far = np.minimum(quarter[a], quarter[b]), np.maximum(quarter[a], quarter[b])
+        first = (near - 2) // 4 + 1
+        last = np.maximum(-((2 - far) // 4), first)
+        splits = split_prefix[last] - split_prefix[first]
+
+        return 2 * (boundaries + splits)
+
+    def nodes(self):
+        # Per-container arrays in graph node order: bay, row, layer, then standard/front/back
+        nodes = dict(self.geometry())
+        slots = nodes['slot']
+        nodes['transmit_power'] = self.transmit_power.ravel()[slots]
+        nodes['malicious'] = self.malicious.ravel()[slots]
+        nodes['jammer'] = self.jammer.ravel()[slots]
+        return nodes
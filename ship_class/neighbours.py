@@ -0,0 +1,62 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+BLOCK_SIZE = 512
+
+
+def pairwise_distances(positions_a, positions_b):
+    squared = (positions_a[:, None, 0] - positions_b[None, :, 0]) ** 2
+    squared += (positions_a[:, None, 1] - positions_b[None, :, 1]) ** 2
+    squared += (positions_a[:, None, 2] - positions_b[None, :, 2]) ** 2
+    return squared ** 0.5
+
+
+def all_pairs(positions, block_size=BLOCK_SIZE, with_distances=True):
+    # Yields (i, j, distance) arrays for every i < j, one block of rows at a time; distance is None
+    # without with_distances, for callers that look the path loss up by index instead
+    n = len(positions)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        rows, cols = np.nonzero(np.arange(stop - start)[:, None] < np.arange(n - start)[None, :])
+        if not with_distances:
+            yield rows + start, cols + start, None
+            continue
+        distances = pairwise_distances(positions[start:stop], positions[start:])
+        yield rows + start, cols + start, distances[rows, cols]
+
+
+def pairs_within(positions, max_range, with_distances=True):
+    # Yields a single (i, j, distance) block with every i < j pair no further apart than max_range
+    tree = cKDTree(positions)
+    pairs = tree.query_pairs(max_range, output_type='ndarray')
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    i, j = pairs[:, 0], pairs[:, 1]
+    if not with_distances:
+        yield i, j, None
+        return
+    diff = positions[i] - positions[j]
+    yield i, j, (diff[:, 0] ** 2 + diff[:, 1] ** 2 + diff[:, 2] ** 2) ** 0.5
+
+
+def candidate_pairs(positions, max_range=np.inf, block_size=BLOCK_SIZE, with_distances=True):
+    if np.isfinite(max_range):
+        # Small slack so pairs sitting exactly on the range are left to the signal test
+        return pairs_within(positions, max_range * (1 + 1e-9), with_distances)
+    return all_pairs(positions, block_size, with_distances)
+
+
+def num_blocks(positions, max_range=np.inf, block_size=BLOCK_SIZE):
+    if np.isfinite(max_range):
+        return 1
+    return -(-len(positions) // block_size)
+
+
+def nearest_distances(positions, block_size=BLOCK_SIZE):
+    # Distance from every point to its nearest other point
+    nearest = np.full(len(positions), np.inf)
+    for start in range(0, len(positions), block_size):
+        distances = pairwise_distances(positions[start:start + block_size], positions)
+        distances[np.arange(len(distances)), np.arange(start, start + len(distances))] = np.inf
+        nearest[start:start + block_size] = distances.min(axis=1)
+    return nearest
@@ -0,0 +1,41 @@
+import numpy as np
+
+
+def exclusion_stencil(min_distance, reach):
+    # Integer offsets closer than min_distance, clipped to +-reach along each axis
+    steps = np.arange(-reach, reach + 1)
+    offsets = np.stack(np.meshgrid(steps, steps, steps, indexing='ij'), axis=-1).reshape(-1, 3)
+    distances = (offsets[:, 0] ** 2 + offsets[:, 1] ** 2 + offsets[:, 2] ** 2) ** 0.5
+    return offsets[distances < min_distance]
+
+
+def sample_min_distance(coordinates, min_distance, rng):
+    # Visits integer cell coordinates in random order and keeps every one that is at least min_distance
+    # from all those kept before it, i.e. a maximal Poisson-disk set by random sequential addition.
+    # Kept cells stamp their exclusion zone into an occupancy grid, so each candidate is a single lookup.
+    coordinates = np.asarray(coordinates, dtype=int).reshape(-1, 3)
+    order = rng.permutation(len(coordinates))
+    if len(coordinates) == 0 or min_distance <= 1:
+        # Distinct lattice cells are always at least 1 apart
+        return coordinates[order]
+
+    origin = coordinates.min(axis=0)
+    shape = coordinates.max(axis=0) - origin + 1
+    local = coordinates - origin
+
+    reach = min(int(np.ceil(min_distance)) - 1, int(shape.max()) - 1)
+    offsets = exclusion_stencil(min_distance, reach)
+
+    blocked = np.zeros(shape, dtype=bool)
+    selected = []
+    for index in order.tolist():
+        point = local[index]
+        if blocked[point[0], point[1], point[2]]:
+            continue
+
+        selected.append(index)
+        zone = point + offsets
+        zone = zone[np.all((zone >= 0) & (zone < shape), axis=1)]
+        blocked[zone[:, 0], zone[:, 1], zone[:, 2]] = True
+
+    return coordinates[selected]
@@ -0,0 +1,137 @@
+from abc import ABC, abstractmethod
+from math import inf
+import numpy as np
+
+
+SPEED_OF_LIGHT = 3e8  # m/s
+
+# Model name -> PropagationModel subclass, filled in by register_model
+MODELS = {}
+
+
+def register_model(cls):
+    MODELS[cls.name] = cls
+    return cls
+
+
+def get_model(name, params=None):
+    if name not in MODELS:
+        raise ValueError(f"Unknown model type: {name}")
+    return MODELS[name](params or {})
+
+
+class PropagationModel(ABC):
+    # Received power as a function of link distance. Models take the ship's shared parameter dict and
+    # read only the keys they use, so switching model does not need new parameters.
+    name = None
+    uses_walls = False  # Whether received_power needs the container walls crossed by each link
+
+    def __init__(self, params):
+        self.params = dict(params)
+
+    @property
+    def deterministic(self):
+        # Deterministic models give the same received power every call, so their path loss can be cached
+        return False
+
+    @abstractmethod
+    def received_power(self, distances, tx_power, rng, walls=None):
+        # Received power (dBm) for arrays of distances (m) and transmit powers (dBm), one random draw per
+        # distance; walls, when the model uses them, holds the container walls crossed by each link
+        pass
+
+    def max_range(self, tx_power, threshold):
+        # Distance beyond which nothing from a tx_power transmitter is received above threshold
+        return inf
+
+
+@register_model
+class LogNormalShadowing(PropagationModel):
+    name = 'log-normal'
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.beta = self.params.get('beta', 2)    # Path loss exponent
+        self.sigma = self.params.get('sigma', 2)  # Standard deviation of shadowing
+
+    @property
+    def deterministic(self):
+        return self.sigma == 0
+
+    def received_power(self, distances, tx_power, rng, walls=None):
+        power = tx_power - 10 * self.beta * np.log10(distances)
+        if self.deterministic:
+            return power
+        return power + rng.normal(0, self.sigma, np.shape(distances))
+
+    def max_range(self, tx_power, threshold):
+        if not self.deterministic:
+            return inf
+        return 10 ** ((tx_power - threshold) / (10 * self.beta))
+
+
+@register_model
+class RayleighFading(PropagationModel):
+    name = 'rayleigh'
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.sigma = self.params.get('sigma', 1)  # Scale parameter for Rayleigh distribution
+
+    def received_power(self, distances, tx_power, rng, walls=None):
+        return rng.rayleigh(scale=self.sigma, size=np.shape(distances))
+
+
+@register_model
+class RiceanFading(PropagationModel):
+    name = 'ricean'
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.v = self.params.get('v', 1)          # LOS component
+        self.sigma = self.params.get('sigma', 1)  # Scattered component
+
+    def received_power(self, distances, tx_power, rng, walls=None):
+        shape = np.shape(distances)
+        return np.hypot(rng.normal(self.v, self.sigma, shape), rng.normal(0, self.sigma, shape))
+
+
+@register_model
+class FreeSpace(PropagationModel):
+    name = 'free-space'
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.frequency = self.params.get('frequency', 2.4e9)  # Frequency in Hz (e.g., 2.4 GHz)
+
+    @property
+    def deterministic(self):
+        return True
+
+    def path_loss(self, distances):
+        # Free Space Path Loss (FSPL) in dB
+        return 20 * np.log10(distances) + 20 * np.log10(self.frequency) - 20 * np.log10(SPEED_OF_LIGHT / (4 * np.pi))
+
+    def received_power(self, distances, tx_power, rng, walls=None):
+        return tx_power - self.path_loss(distances)
+
+    def max_range(self, tx_power, threshold):
+        margin = tx_power - threshold - 20 * np.log10(self.frequency) + 20 * np.log10(SPEED_OF_LIGHT / (4 * np.pi))
+        return 10 ** (margin / 20)
+
+
+@register_model
+class SteelContainer(FreeSpace):
+    # Free-space loss plus a fixed penetration loss for every steel container wall the link passes through.
+    # Assumes a fully loaded stack (see ShipLayout.walls_between), as empty cells would add no walls.
+    name = 'steel-container'
+    uses_walls = True
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.wall_loss = self.params.get('wall_loss', 10)  # dB per wall
+
+    def received_power(self, distances, tx_power, rng, walls=None):
+        if walls is None:
+            raise ValueError(f"The {self.name} model needs the walls crossed by each link.")
+        return super().received_power(distances, tx_power, rng) - self.wall_loss * walls
@@ -2,11 +2,20 @@ from abc import ABC, abstractmethod
 from container import Container, Standard_Container, Small_Container
 # import plotly.graph_objects as go
 # import plotly.offline as pyo
+import hashlib
+import os
 import networkx as nx
 import numpy as np
-import random
 from math import inf
 from tqdm import tqdm
+from layout import ShipLayout, STANDARD, SMALL_FRONT, SMALL_BACK, SLOT_NAMES
+from neighbours import BLOCK_SIZE, candidate_pairs, num_blocks, pairwise_distances
+from placement import sample_min_distance
+from connectivity import analyse_edges, avg_min_jammer_distance, summarise
+from incremental import IncrementalJammerEvaluator
+from lattice import LatticePathLoss
+from graph import SparseGraph
+from propagation import get_model
 # from ship_visualizer import plot_ship_layout
 from ship_analyzer import analyse_graph, plot_container_network, plot_container_network_coloured
 
@@ -14,6 +23,7 @@ from ship_analyzer import analyse_graph, plot_container_network, plot_container_
 TRANSMIT_POWER = 0
 COMMUNICATION_THRESHOLD = -inf
 JAMMER_POWER = 3
+NOISE_METHODS = ('direct', 'fft')
 
 
 class Ship:
@@ -21,10 +31,11 @@ class Ship:
     COMMUNICATION_THRESHOLD = -inf
 
     class Cell:
+        length = 12
+        width = 3
+        height = 5
+
         def __init__(self, x, y, z):
-            self.length = 12
-            self.width = 3
-            self.height = 5
             self.x = x * self.length + self.length / 2
             self.y = y * self.width + self.width / 2
             self.z = z * self.height + self.height / 2
@@ -66,38 +77,115 @@ class Ship:
                 if verbose:
                     print("Standard container added.")
 
-    def __init__(self, bays=1, rows=25, layers=25):
+    def __init__(self, bays=1, rows=25, layers=25, seed=None):
         self.bays = bays
         self.rows = rows
         self.layers = layers
-        self.cells = [[[self.Cell(x, y, z) for z in range(self.layers)] for y in range(self.rows)] for x in range(self.bays)]
-        
-        self.G = None
+        self.layout = ShipLayout(bays, rows, layers, cell_size=(self.Cell.length, self.Cell.width, self.Cell.height))
+
+        self.rng = np.random.default_rng(seed)
+
+        # Layout node arrays and (u, v, signal_strength) edge arrays from the last vectorized graph build,
+        # self.G is only turned into a networkx graph from them when something asks for it
+        self._G = None
+        self.nodes = None
+        self.edges = None
 
         self.model = 'free-space'
         self.model_params = {
             'beta': 2,   # Path loss exponent (for log-normal)
             'sigma': 2,  # Shadowing variance (for log-normal) or Rayleigh/Ricean scale
             'v': 1,      # Ricean LOS component
-            'frequency': 2.4e9  # Frequency in Hz for free-space model
+            'frequency': 2.4e9,  # Frequency in Hz for free-space and steel-container models
+            'wall_loss': 10      # Penetration loss in dB per container wall (for steel-container)
         }
 
-    def set_model(self, model, model_params=None):        
+        self._propagation = None
+        self._cells = None  # Cached object view, see cells
+
+        # Pairwise path loss between containers, see path_loss_matrix and enable_path_loss_cache
+        self.path_loss_cache = None
+        self._lattice_path_loss = None
+
+    @property
+    def G(self):
+        if self._G is None and self.edges is not None:
+            self._G = self._build_nodes(self.nodes)
+            self._add_edges(self._G, self.nodes, self.edges)
+        return self._G
+
+    @G.setter
+    def G(self, G):
+        self._G = G
+        self.nodes = None
+        self.edges = None
+
+    def seed(self, seed):
+        # Reseed the fading draws, e.g. once per sweep trial for reproducible results
+        self.rng = np.random.default_rng(seed)
+
+    def set_model(self, model, model_params=None):
+        get_model(model)  # Fail early on unknown names
         self.model = model
         if model_params:
             self.model_params.update(model_params)
+
+    @property
+    def propagation(self):
+        # PropagationModel for the current model name and parameters, rebuilt only when they change
+        key = (self.model, tuple(sorted(self.model_params.items())))
+        if self._propagation is None or self._propagation[0] != key:
+            self._propagation = (key, get_model(self.model, self.model_params))
+        return self._propagation[1]
     
+    @property
+    def cells(self):
+        # Read-only Cell/Container object view of the layout for plotting code. The objects are copies:
+        # writing to them (e.g. cells[x][y][z].container.jammer) does not change the ship, use
+        # set_behaviour instead. The view is rebuilt only when the layout or its behaviour changes, so
+        # bind it once (cells = ship.cells) rather than indexing ship.cells inside loops.
+        layout = self.layout
+        if self._cells is not None:
+            version, snapshot, cells = self._cells
+            if version == layout.version and all(np.array_equal(a, b) for a, b in zip(snapshot, layout.snapshot())):
+                return cells
+
+        cells = [[[self.Cell(x, y, z) for z in range(self.layers)] for y in range(self.rows)] for x in range(self.bays)]
+
+        nodes = self.layout.nodes()
+        for (x, y, z), kind, transmit_power, malicious, jammer in zip(nodes['cell'].tolist(), nodes['kind'].tolist(), nodes['transmit_power'].tolist(), nodes['malicious'].tolist(), nodes['jammer'].tolist()):
+            cell = cells[x][y][z]
+            if kind == STANDARD:
+                container = Standard_Container(transmit_power)
+                cell.add_standard_container(container)
+            else:
+                container = Small_Container(transmit_power)
+                cell.add_small_container(container, "front" if kind == SMALL_FRONT else "back")
+            container.malicious = malicious
+            container.jammer = jammer
+
+        self._cells = (layout.version, layout.snapshot(), cells)
+        return cells
+
     def add_container(self, container, x, y, z, position="front"):
-        cell = self.cells[x][y][z]
-        if not cell.container:
+        # The layout copies the container's power and flags when it is placed; changing the container
+        # afterwards does not change the ship, use set_behaviour for that
+        if not self.layout.occupied[x, y, z, STANDARD]:
             if isinstance(container, Small_Container):
                 if position not in ["front", "back"]:
                     raise ValueError("Position must be 'front' or 'back' for small containers.")
-                cell.add_small_container(container, position)
+                slot = SMALL_FRONT if position == "front" else SMALL_BACK
             elif isinstance(container, Standard_Container):
-                cell.add_standard_container(container)
+                slot = STANDARD
             else:
                 raise ValueError("Unknown container type.")
+
+            if self.layout.place(x, y, z, slot, container.transmit_power, container.malicious, container.jammer):
+                cell = self.Cell(x, y, z)
+                offset = {STANDARD: 0, SMALL_FRONT: -cell.length / 4, SMALL_BACK: cell.length / 4}[slot]
+                container.x = cell.x + offset
+                container.y = cell.y
+                container.z = cell.z
         else:
             print(f"Cell ({x}, {y}, {z}) is already occupied.")
 
@@ -106,51 +194,112 @@ class Ship:
         y_range = eval(f"range(self.rows)[{y_slice}]")
         z_range = eval(f"range(self.layers)[{z_slice}]")
 
-        for x in x_range:
-            for y in y_range:
-                for z in z_range:
-                    if container_type == 'small':
-                        self.add_container(Small_Container(), x, y, z, 'front')
-                        self.add_container(Small_Container(), x, y, z, 'back')
-                    elif container_type == 'standard':
-                        self.add_container(Standard_Container(), x, y, z)
-                    else:
-                        raise ValueError("Unknown container type.")
+        if container_type not in ['small', 'standard']:
+            raise ValueError("Unknown container type.")
+
+        occupied = self.layout.occupied[np.ix_(x_range, y_range, z_range)][..., STANDARD]
+        for i, j, k in np.argwhere(occupied):
+            print(f"Cell ({x_range[i]}, {y_range[j]}, {z_range[k]}) is already occupied.")
+
+        self.layout.fill(x_range, y_range, z_range, container_type)
 
     def set_behaviour(self, x_range, y_range, z_range, malicious=False, jammer=False, transmit_power=TRANSMIT_POWER):
-        if jammer:
-            malicious = True
-
-        for x in x_range:
-            for y in y_range:
-                for z in z_range:
-                    cell = self.cells[x][y][z]
-                    
-                    # Set behavior for the standard container
-                    if cell.container:
-                        cell.container.malicious = malicious
-                        cell.container.jammer = jammer
-                        cell.container.transmit_power = transmit_power
-                    else:
-                        # If container is None, randomly select front or back half
-                        if cell.front_half and cell.back_half:
-                            selected_half = random.choice([cell.front_half, cell.back_half])
-                            selected_half.malicious = malicious
-                            selected_half.jammer = jammer
-                            selected_half.transmit_power = transmit_power
-                            continue
-
-                    # # Set behavior for the front half if it exists
-                    # if cell.front_half:
-                    #     cell.front_half.malicious = malicious
-                    #     cell.front_half.jammer = jammer
-                    #     cell.front_half.transmit_power = transmit_power
-
-                    # # # Set behavior for the back half if it exists
-                    # # if cell.back_half:
-                    # #     cell.back_half.malicious = malicious
-                    # #     cell.back_half.jammer = jammer
-                    # #     cell.back_half.transmit_power = transmit_power
+        x, y, z = np.meshgrid(np.asarray(x_range, dtype=int), np.asarray(y_range, dtype=int), np.asarray(z_range, dtype=int), indexing='ij')
+        self.set_behaviour_bulk(np.stack([x.ravel(), y.ravel(), z.ravel()], axis=1), malicious=malicious, jammer=jammer, transmit_power=transmit_power)
+
+    def set_behaviour_bulk(self, cells, malicious=False, jammer=False, transmit_power=TRANSMIT_POWER):
+        # cells is an (n, 3) array of (bay, row, layer) indices or a (bays, rows, layers) boolean mask;
+        # malicious, jammer and transmit_power may be scalars or per-cell arrays in the same order. With
+        # a mask they may also be arrays of the mask's shape, of which only the masked cells are used.
+        cells = np.asarray(cells)
+        if cells.dtype == bool:
+            mask = cells
+            cells = np.argwhere(mask)
+            # Boolean indexing visits cells in the same (C) order as argwhere
+            malicious, jammer, transmit_power = (
+                np.asarray(value)[mask] if np.ndim(value) == mask.ndim else value
+                for value in (malicious, jammer, transmit_power)
+            )
+        cells = cells.reshape(-1, 3)
+
+        jammer = np.asarray(jammer, dtype=bool)
+        malicious = np.asarray(malicious, dtype=bool) | jammer
+
+        self.layout.set_cell_behaviour(cells[:, 0], cells[:, 1], cells[:, 2], self.rng, malicious=malicious, jammer=jammer, transmit_power=transmit_power)
+
+    def enable_path_loss_cache(self, directory=None):
+        # Dense matrix for deterministic models the lattice table cannot serve, such as those counting
+        # walls. It holds one float64 per container pair, so budget n^2 * 8 bytes for it
+        self.path_loss_cache = {'directory': directory, 'key': None, 'matrix': None}
+
+    def _is_deterministic(self):
+        return self.propagation.deterministic
+
+    def _walls(self, a, b):
+        # Container walls between nodes a and b (layout.nodes() indices), for models that use them
+        if not self.propagation.uses_walls:
+            return None
+        return self.layout.walls_between(a, b)
+
+    def path_loss_matrix(self):
+        # Path loss between every pair of containers, or None when the model is random. Models depending
+        # on distance alone get a lattice table; others only a dense matrix, when the cache is enabled.
+        if not self._is_deterministic():
+            return None
+
+        params = tuple(sorted(self.model_params.items()))
+        key = (self.layout.version, self.model, params)
+        if not self.propagation.uses_walls:
+            if self._lattice_path_loss is None or self._lattice_path_loss[0] != key:
+                # Received power with 0 dBm transmit power is exactly minus the path loss
+                table = LatticePathLoss(self.layout, lambda dist: -self.calculate_signal_strength(dist, 0, self.model, self.model_params))
+                self._lattice_path_loss = (key, table)
+            return self._lattice_path_loss[1]
+
+        cache = self.path_loss_cache
+        if cache is None:
+            return None
+        if cache['key'] == key:
+            return cache['matrix']
+
+        filename = None
+        if cache['directory']:
+            digest = hashlib.sha1(repr((self.model, params)).encode()).hexdigest()[:12]
+            filename = os.path.join(cache['directory'], f"{self.bays}x{self.rows}x{self.layers}-{self.layout.signature()}-{self.model}-{digest}.npy")
+
+        if filename and os.path.exists(filename):
+            matrix = np.load(filename)
+        else:
+            positions = self.layout.geometry()['pos']
+            matrix = np.empty((len(positions), len(positions)))
+            for start in tqdm(range(0, len(positions), BLOCK_SIZE), desc="Caching path loss    ", leave=False):
+                dist = pairwise_distances(positions[start:start + BLOCK_SIZE], positions)
+                walls = self._walls(np.arange(start, min(start + BLOCK_SIZE, len(positions)))[:, None], np.arange(len(positions)))
+                with np.errstate(divide='ignore'):
+                    # Received power with 0 dBm transmit power is exactly minus the path loss
+                    matrix[start:start + BLOCK_SIZE] = -self.calculate_signal_strength(dist, 0, self.model, self.model_params, walls=walls)
+
+            if filename:
+                os.makedirs(cache['directory'], exist_ok=True)
+                temp_filename = f"{filename}.{os.getpid()}.tmp.npy"
+                np.save(temp_filename, matrix)
+                os.replace(temp_filename, filename)
+
+        cache['key'] = key
+        cache['matrix'] = matrix
+        return matrix
+
+    def reset_behaviour(self):
+        # Make every container honest again at TRANSMIT_POWER, keeping the loaded layout
+        self.layout.reset()
+        self.G = None
+
+    def snapshot_behaviour(self):
+        return self.layout.snapshot()
+
+    def restore_behaviour(self, snapshot):
+        self.layout.restore(snapshot)
+        self.G = None
 
     def set_max_nodes_in_plane(self, plane, index, min_distance, malicious=True, jammer=False, transmit_power=TRANSMIT_POWER):
         if plane not in ["bays", "rows", "layers"]:
@@ -163,35 +312,19 @@ class Ship:
         elif plane == "layers":
             nodes_in_plane = [(x, y, index) for x in range(self.bays) for y in range(self.rows)]
 
-        selected_nodes = []
-
-        while nodes_in_plane:
-            node = random.choice(nodes_in_plane)
-            nodes_in_plane.remove(node)
-
-            if all(self._distance(node, selected_node) >= min_distance for selected_node in selected_nodes):
-                selected_nodes.append(node)
-                x, y, z = node
-                self.set_behaviour([x], [y], [z], malicious=malicious, jammer=jammer, transmit_power=transmit_power)        
+        selected_nodes = sample_min_distance(nodes_in_plane, min_distance, self.rng)
+        self.set_behaviour_bulk(selected_nodes, malicious=malicious, jammer=jammer, transmit_power=transmit_power)
 
     def set_max_nodes(self, min_distance, malicious=True, jammer=False, transmit_power=TRANSMIT_POWER):
-            nodes = [(x, y, z) for x in range(self.bays) for y in range(self.rows) for z in range(self.layers)]
-            selected_nodes = []
-
-            while nodes:
-                node = random.choice(nodes)
-                nodes.remove(node)
+        nodes = np.argwhere(np.ones((self.bays, self.rows, self.layers), dtype=bool))
 
-                if all(self._distance(node, selected_node) >= min_distance for selected_node in selected_nodes):
-                    selected_nodes.append(node)
-                    x, y, z = node
-                    self.set_behaviour([x], [y], [z], malicious=malicious, jammer=jammer, transmit_power=transmit_power)
+        selected_nodes = sample_min_distance(nodes, min_distance, self.rng)
+        self.set_behaviour_bulk(selected_nodes, malicious=malicious, jammer=jammer, transmit_power=transmit_power)
 
     def set_n_nodes(self, n, malicious=True, jammer=False, transmit_power=TRANSMIT_POWER):
-        all_nodes = [(x, y, z) for x in range(self.bays) for y in range(self.rows) for z in range(self.layers)]
-        selected_nodes = random.sample(all_nodes, min(n, len(all_nodes)))
-        for x, y, z in selected_nodes:
-            self.set_behaviour([x], [y], [z], malicious=malicious, jammer=jammer, transmit_power=transmit_power)
+        all_nodes = np.argwhere(np.ones((self.bays, self.rows, self.layers), dtype=bool))
+        selected_nodes = self.rng.choice(all_nodes, min(n, len(all_nodes)), replace=False)
+        self.set_behaviour_bulk(selected_nodes, malicious=malicious, jammer=jammer, transmit_power=transmit_power)
 
     def set_n_nodes_in_plane(self, plane, index, n, malicious=True, jammer=False, transmit_power=TRANSMIT_POWER):
         if plane not in ["bays", "rows", "layers"]:
@@ -204,29 +337,176 @@ class Ship:
         elif plane == "layers":
             nodes_in_plane = [(x, y, index) for x in range(self.bays) for y in range(self.rows)]
 
-        selected_nodes = random.sample(nodes_in_plane, min(n, len(nodes_in_plane)))
+        selected_nodes = self.rng.choice(nodes_in_plane, min(n, len(nodes_in_plane)), replace=False)
+        self.set_behaviour_bulk(selected_nodes, malicious=malicious, jammer=jammer, transmit_power=transmit_power)
 
-        for x, y, z in selected_nodes:
-            self.set_behaviour([x], [y], [z], malicious=malicious, jammer=jammer, transmit_power=transmit_power)
-
-    def generate_container_graph(self):        
+    def _build_nodes(self, nodes):
         G = nx.Graph()
-        
+
         # Step 1: Build nodes
-        for x in tqdm(range(self.bays), desc="Building nodes       ", leave=False):
-            for y in range(self.rows):
-                for z in range(self.layers):
-                    cell = self.cells[x][y][z]
-                    if cell.container:
-                        node_id = f"C({x},{y},{z})"
-                        G.add_node(node_id, pos=(cell.x, cell.y, cell.z), container='standard', transmit_power=cell.container.transmit_power, malicious=cell.container.malicious, jammer=cell.container.jammer)
-                    if cell.front_half:
-                        node_id = f"F({x},{y},{z})"
-                        G.add_node(node_id, pos=(cell.front_half.x, cell.front_half.y, cell.front_half.z), container='small_front', transmit_power=cell.front_half.transmit_power, malicious=cell.front_half.malicious, jammer=cell.front_half.jammer)
-                    if cell.back_half:
-                        node_id = f"B({x},{y},{z})"
-                        G.add_node(node_id, pos=(cell.back_half.x, cell.back_half.y, cell.back_half.z), container='small_back', transmit_power=cell.back_half.transmit_power, malicious=cell.back_half.malicious, jammer=cell.back_half.jammer)
-        
+        G.add_nodes_from(
+            (node_id, {'pos': tuple(pos), 'container': SLOT_NAMES[kind], 'transmit_power': transmit_power, 'malicious': malicious, 'jammer': jammer})
+            for node_id, pos, kind, transmit_power, malicious, jammer in zip(
+                nodes['id'], nodes['pos'].tolist(), nodes['kind'].tolist(),
+                nodes['transmit_power'].tolist(), nodes['malicious'].tolist(), nodes['jammer'].tolist()
+            )
+        )
+
+        return G
+
+    def _add_edges(self, G, nodes, edges):
+        u, v, signal_strength = edges
+        node_ids = nodes['id']
+        G.add_edges_from(
+            (node_ids[a], node_ids[b], {'signal_strength': s})
+            for a, b, s in zip(u.tolist(), v.tolist(), signal_strength.tolist())
+        )
+
+    def _build_edges(self, nodes, noise_floor=None, max_jamming=None, directional=False):
+        # Returns (u, v, signal_strength) arrays of edges between honest nodes, indexed like nodes.
+        # With directional=True the signal is split into (u -> v, v -> u) instead of the weaker of the two.
+        honest = np.flatnonzero(~nodes['malicious'])
+        positions = nodes['pos'][honest]
+        transmit_power = nodes['transmit_power'][honest]
+
+        path_loss = self.path_loss_matrix()
+        edges_u, edges_v, edges_signal, edges_signal_21 = [np.empty(0, dtype=int)], [np.empty(0, dtype=int)], [np.empty(0)], [np.empty(0)]
+
+        max_range = self._max_range(transmit_power.max()) if len(honest) else inf
+        pairs = candidate_pairs(positions, max_range, with_distances=path_loss is None)
+        for i, j, dist in tqdm(pairs, total=num_blocks(positions, max_range), desc="Building edges       ", leave=False):
+            if path_loss is None:
+                walls = self._walls(honest[i], honest[j])
+                signal_strength = self.calculate_signal_strength(dist, transmit_power[i], self.model, self.model_params, walls=walls)
+            else:
+                loss = path_loss[honest[i], honest[j]]
+                signal_strength = transmit_power[i] - loss
+
+            if noise_floor is None:
+                signal_strength_21 = signal_strength
+                keep = signal_strength > COMMUNICATION_THRESHOLD
+                if max_jamming is not None:
+                    # Drop links that the strongest jammer at either end overpowers
+                    keep &= (signal_strength >= max_jamming[i]) & (signal_strength >= max_jamming[j])
+            else:
+                # Both directions must clear the receiver's noise floor and the communication threshold
+                if path_loss is None:
+                    signal_strength_21 = self.calculate_signal_strength(dist, transmit_power[j], self.model, self.model_params, walls=walls)
+                else:
+                    signal_strength_21 = transmit_power[j] - loss
+                keep = (signal_strength > noise_floor[j]) & (signal_strength > COMMUNICATION_THRESHOLD) & \
+                       (signal_strength_21 > noise_floor[i]) & (signal_strength_21 > COMMUNICATION_THRESHOLD)
+
+            edges_u.append(honest[i[keep]])
+            edges_v.append(honest[j[keep]])
+            edges_signal.append(signal_strength[keep])
+            edges_signal_21.append(signal_strength_21[keep])
+
+        u, v = np.concatenate(edges_u), np.concatenate(edges_v)
+        signal_strength, signal_strength_21 = np.concatenate(edges_signal), np.concatenate(edges_signal_21)
+        if directional:
+            return u, v, signal_strength, signal_strength_21
+        return u, v, np.minimum(signal_strength, signal_strength_21)
+
+    def _jamming_power(self, nodes, dtype=np.float64):
+        # Yields (block, received power of every jammer at each honest node in the block) in dBm
+        jammers = nodes['jammer']
+        if not jammers.any():
+            return
+
+        honest = np.flatnonzero(~nodes['malicious'])
+        jammers = np.flatnonzero(jammers)
+        honest_positions = nodes['pos'][honest].astype(dtype)
+        jammer_positions = nodes['pos'][jammers].astype(dtype)
+        jammer_power = nodes['transmit_power'][jammers].astype(dtype)
+        path_loss = self.path_loss_matrix()
+
+        for start in range(0, len(honest_positions), BLOCK_SIZE):
+            block = slice(start, start + BLOCK_SIZE)
+            if path_loss is None:
+                dist = pairwise_distances(honest_positions[block], jammer_positions)
+                walls = self._walls(honest[block][:, None], jammers)
+                jamming_power = self.calculate_signal_strength(dist, jammer_power, self.model, self.model_params, walls=walls)
+            else:
+                jamming_power = jammer_power - path_loss[np.ix_(honest[block], jammers)]
+            yield block, jamming_power.astype(dtype, copy=False)
+
+    def _noise_floor(self, nodes, dtype=np.float64, method='direct'):
+        # Cumulative jamming power (dBm) at every honest node, summed in linear power. method='fft' sums
+        # all jammers at once by convolving over the container lattice, in O(n log n) whatever their
+        # number, up to FFT round-off; it needs a path loss that depends on distance alone.
+        if method not in NOISE_METHODS:
+            raise ValueError(f"Unknown noise method: {method}")
+
+        noise = np.zeros(np.count_nonzero(~nodes['malicious']), dtype=dtype)
+        if method == 'fft':
+            path_loss = self.path_loss_matrix()
+            if not isinstance(path_loss, LatticePathLoss):
+                raise ValueError(f"The fft noise method does not support the {self.model} model.")
+            jammers = np.flatnonzero(nodes['jammer'])
+            if len(jammers):
+                power = 10 ** (nodes['transmit_power'][jammers] / 10)
+                noise[:] = path_loss.received_sum(jammers, power, np.flatnonzero(~nodes['malicious']))
+        else:
+            for block, jamming_power in self._jamming_power(nodes, dtype):
+                noise[block] = np.sum(10 ** (jamming_power / 10), axis=1)
+
+        with np.errstate(divide='ignore'):
+            return 10 * np.log10(noise)
+
+    def _max_jamming(self, nodes, dtype=np.float64):
+        # Strongest single jammer (dBm) heard at every honest node
+        max_jamming = np.full(np.count_nonzero(~nodes['malicious']), -inf, dtype=dtype)
+        for block, jamming_power in self._jamming_power(nodes, dtype):
+            max_jamming[block] = jamming_power.max(axis=1)
+
+        return max_jamming
+
+    def _max_range(self, P_t):
+        # Distance beyond which no link from a P_t transmitter clears COMMUNICATION_THRESHOLD
+        if COMMUNICATION_THRESHOLD == -inf:
+            return inf
+        # Infinite for fading and shadowing models, which have no hard range
+        return self.propagation.max_range(P_t, COMMUNICATION_THRESHOLD)
+
+    def _evaluate_edges(self, cumulative=True, dtype=np.float64, noise_method='direct'):
+        nodes = self.layout.nodes()
+        if cumulative:
+            edges = self._build_edges(nodes, noise_floor=self._noise_floor(nodes, dtype, noise_method))
+        else:
+            # Build edges and drop those overpowered by a jammer in one pass
+            edges = self._build_edges(nodes, max_jamming=self._max_jamming(nodes, dtype))
+
+        self.G = None
+        self.nodes = nodes
+        self.edges = edges
+
+    def evaluate(self, cumulative=True, dtype=np.float64, verbose=False, noise_method='direct'):
+        # Graph build and analysis straight from the layout arrays, no networkx graph is created
+        self._evaluate_edges(cumulative, dtype, noise_method)
+        return self.analyse_graph(verbose=verbose)
+
+    def jammer_curve(self, n, transmit_power=TRANSMIT_POWER, cumulative=True, dtype=np.float64):
+        # evaluate() results for 0..n random jammers, growing one placement a jammer at a time instead of
+        # rebuilding the graph per count; entry k holds k jammers on top of the current behaviour
+        evaluator = IncrementalJammerEvaluator(self, cumulative, dtype)
+        for x, y, z in self.rng.permutation(np.argwhere(np.ones((self.bays, self.rows, self.layers), dtype=bool))).tolist():
+            if evaluator.step >= n:
+                break
+            evaluator.add_jammer_cell(x, y, z, transmit_power)
+        return evaluator.curve()
+
+    def generate_container_graph(self, vectorized=True, dtype=np.float64, sparse=False):
+        # sparse=True also returns the graph as a SparseGraph, see sparse_graph
+        if vectorized:
+            self._evaluate_edges(cumulative=False, dtype=dtype)
+            return self.sparse_graph() if sparse else None
+        if sparse:
+            raise ValueError("Sparse graphs are only built by the vectorized builder.")
+
+        nodes = self.layout.nodes()
+        G = self._build_nodes(nodes)
+
         # Step 2: Build edges based on signal strength
         nodes = list(G.nodes(data=True))
         for i, (node1, data1) in tqdm(enumerate(nodes), total=len(nodes), desc="Building edges       ", leave=False):
@@ -258,23 +538,17 @@ class Ship:
 
         self.G = G
 
-    def generate_container_graph_cumulative(self):
-        G = nx.Graph()
+    def generate_container_graph_cumulative(self, vectorized=True, dtype=np.float64, noise_method='direct', sparse=False):
+        # noise_method is 'direct' or 'fft', see _noise_floor; the loop version always sums directly.
+        # sparse=True also returns the graph as a SparseGraph, see sparse_graph
+        if vectorized:
+            self._evaluate_edges(cumulative=True, dtype=dtype, noise_method=noise_method)
+            return self.sparse_graph() if sparse else None
+        if sparse:
+            raise ValueError("Sparse graphs are only built by the vectorized builder.")
 
-        # Step 1: Build nodes
-        for x in tqdm(range(self.bays), desc="Building nodes       ", leave=False):
-            for y in range(self.rows):
-                for z in range(self.layers):
-                    cell = self.cells[x][y][z]
-                    if cell.container:
-                        node_id = f"C({x},{y},{z})"
-                        G.add_node(node_id, pos=(cell.x, cell.y, cell.z), container='standard', transmit_power=cell.container.transmit_power, malicious=cell.container.malicious, jammer=cell.container.jammer)
-                    if cell.front_half:
-                        node_id = f"F({x},{y},{z})"
-                        G.add_node(node_id, pos=(cell.front_half.x, cell.front_half.y, cell.front_half.z), container='small_front', transmit_power=cell.front_half.transmit_power, malicious=cell.front_half.malicious, jammer=cell.front_half.jammer)
-                    if cell.back_half:
-                        node_id = f"B({x},{y},{z})"
-                        G.add_node(node_id, pos=(cell.back_half.x, cell.back_half.y, cell.back_half.z), container='small_back', transmit_power=cell.back_half.transmit_power, malicious=cell.back_half.malicious, jammer=cell.back_half.jammer)
+        nodes = self.layout.nodes()
+        G = self._build_nodes(nodes)
 
         # Step 2: Calculate noise floors due to jammers
         noise_floor = {}
@@ -320,110 +594,58 @@ class Ship:
 
         self.G = G
 
-    def analyse_graph(self, verbose=False):
+    def sparse_graph(self):
+        # CSR adjacency of the last vectorized graph build, without creating the networkx graph
+        if self.edges is None:
+            raise ValueError("No vectorized graph has been built.")
+        return SparseGraph.from_edges(self.nodes, *self.edges)
+
+    def analyse_graph(self, verbose=False, graph=None):
+        # Analyses graph (a SparseGraph) if given, otherwise the ship's last built graph
+        if graph is not None:
+            return graph.analyse(verbose=verbose)
+        if self.edges is not None:
+            u, v, _ = self.edges
+            return analyse_edges(self.nodes, u, v, verbose=verbose)
+
         total_nodes = len(self.G.nodes())
-        unconnected = [node for node in self.G.nodes() if len(list(self.G.neighbors(node))) == 0]
+        unconnected = [node for node in self.G.nodes() if self.G.degree(node) == 0]
         num_unconnected = len(unconnected)
-        num_connected = total_nodes - num_unconnected
-        
-        connected_subgraph = self.G.subgraph([n for n in self.G.nodes() if len(list(self.G.neighbors(n))) > 0])
-        connected_components = list(nx.connected_components(connected_subgraph))
-        num_connected_components = len(connected_components)
 
-        honest_nodes = [node for node, data in self.G.nodes(data=True) if not data['malicious']]
+        # Order components by their first node so both analysis paths agree
+        node_order = {node: i for i, node in enumerate(self.G.nodes())}
+        connected_subgraph = self.G.subgraph([n for n in self.G.nodes() if self.G.degree(n) > 0])
+        connected_components = sorted(nx.connected_components(connected_subgraph), key=lambda component: min(node_order[n] for n in component))
+
         malicious_nodes = [node for node, data in self.G.nodes(data=True) if data['malicious']]
         jamming_nodes = [node for node in malicious_nodes if self.G.nodes[node]['jammer']]
-        non_jamming_malicious_nodes = [node for node in malicious_nodes if not self.G.nodes[node]['jammer']]
-
-        num_honest = len(honest_nodes)
-        num_malicious = len(malicious_nodes)
-        num_jamming = len(jamming_nodes)
-        num_non_jammings = len(non_jamming_malicious_nodes)
-
-        B = total_nodes - 1 - 3 * num_malicious
-        trustset_configuration = B >= (num_unconnected - num_jamming)
-
-        status = "Pass" if trustset_configuration and num_connected_components == 1 else "Fail"
-
-        avg_min_distance = 'N/A'
-        if num_jamming > 1:
-            min_distances = []
-            for i, jammer_node in enumerate(jamming_nodes):
-                jammer_pos = self.G.nodes[jammer_node]['pos']
-                min_distance = min(
-                    self._distance(jammer_pos, self.G.nodes[other_jammer]['pos'])
-                    for other_jammer in jamming_nodes if other_jammer != jammer_node
-                )
-                min_distances.append(min_distance)
-            avg_min_distance = sum(min_distances) / len(min_distances)
-
-        analysis_results = {
-            'total_nodes': total_nodes,
-            'num_honest': num_honest,
-            'num_jamming': num_jamming,
-            'num_unconnected': num_unconnected,
-            'num_connected': num_connected,
-            'buffer_margin': B,
-            'trustset_configuration': trustset_configuration,
-            'num_connected_components': num_connected_components,
-            'connected_components': {f'Component_{i+1}': len(comp) for i, comp in enumerate(connected_components)},
-            'avg_min_distance_jammers': avg_min_distance,
-            'status': status
-        }
-
-        if verbose:
-            print(f"\nTotal nodes             : {total_nodes}")
-            print(f"  Honest Nodes          : {num_honest}")
-            print(f"  Jamming Nodes         : {num_jamming}\n")
-            print(f"Total disconnected      : {num_unconnected}")
-            print(f"  Potential Honest      : {num_unconnected - num_jamming}")
-            print(f"  Buffer Margin         : {B}\n")
-            print(f"Trustset Configuration  : {trustset_configuration}\n")
-            print(f"Components              : {num_connected_components}")
-            if num_connected_components > 1:
-                for i, component in enumerate(connected_components):
-                    print(f"  Component {i + 1:<12}: {len(component)} nodes")
-                print()
-            else:
-                print()
-
-            if avg_min_distance != 'N/A':
-                print(f"Average Distance        : {avg_min_distance:.2f}\n")
-            else:
-                print(f"Average Distance        : N/A\n")
-
-            print(f"Status                  : {status}\n")
-
-        return analysis_results
+        jammer_positions = np.array([self.G.nodes[node]['pos'] for node in jamming_nodes], dtype=float).reshape(-1, 3)
+
+        return summarise(
+            total_nodes,
+            len(malicious_nodes),
+            len(jamming_nodes),
+            num_unconnected,
+            [len(component) for component in connected_components],
+            avg_min_jammer_distance(jammer_positions),
+            verbose=verbose,
+        )
 
     def _distance(self, pos1, pos2):
         x1, y1, z1 = pos1
         x2, y2, z2 = pos2
         return ((x1 - x2) ** 2 + (y1 - y2) ** 2 + (z1 - z2) ** 2) ** 0.5
 
-    def calculate_signal_strength(self, distance, P_t, model, model_params):
-        if model == 'log-normal':                     # Log-Normal Shadowing Model
-            beta = model_params.get('beta', 2)        # Path loss exponent
-            sigma = model_params.get('sigma', 2)      # Standard deviation of shadowing
-            return P_t - 10 * beta * np.log10(distance) + np.random.normal(0, sigma)
-
-        elif model == 'rayleigh':                     # Rayleigh Fading Model
-            sigma = model_params.get('sigma', 1)      # Scale parameter for Rayleigh distribution
-            return np.random.rayleigh(scale=sigma)
-
-        elif model == 'ricean':                       # Ricean Fading Model
-            v = model_params.get('v', 1)              # LOS component
-            sigma = model_params.get('sigma', 1)      # Scattered component
-            return np.random.rice(v, sigma)
-
-        elif model == 'free-space':                   # Free Space Path Loss (FSPL) Model
-            f = model_params.get('frequency', 2.4e9)  # Frequency in Hz (e.g., 2.4 GHz)
-            c = 3e8                                   # Speed of light in m/s
-            fspl = 20 * np.log10(distance) + 20 * np.log10(f) - 20 * np.log10(c / (4 * np.pi))
-            return P_t - fspl
-
+    def calculate_signal_strength(self, distance, P_t, model, model_params, rng=None, walls=None):
+        # Works on scalars or arrays, drawing one fading sample per distance from rng (default self.rng);
+        # walls, for models that use them, is the number of container walls crossed per distance
+        if rng is None:
+            rng = self.rng
+        if model == self.model and model_params is self.model_params:
+            propagation = self.propagation
         else:
-            raise ValueError(f"Unknown model type: {model}")
+            propagation = get_model(model, model_params)
+        return propagation.received_power(distance, P_t, rng, walls)
 
 
 def combine_plots(fig1, fig2):
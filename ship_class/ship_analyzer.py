@@ -1,10 +1,16 @@
 import plotly.graph_objects as go
 import plotly.offline as pyo
 import networkx as nx
-from tqdm import tqdm
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components as sparse_connected_components
+from graph import SparseGraph
 
 
 def analyse_graph(G):
+    if isinstance(G, SparseGraph):
+        return G.analyse(verbose=True)
+
     total_nodes = len(G.nodes())
     unconnected = [node for node in G.nodes() if len(list(G.neighbors(node))) == 0]
     num_unconnected = len(unconnected)
@@ -50,84 +56,47 @@ def analyse_graph(G):
     print(f"Status                  : {status}\n")
 
 
-def plot_container_network(ship, camera, name, display=True):
-    if ship.G is None:
-        ship.generate_container_graph()
-    
-    G = ship.G
+def _graph_arrays(G):
+    # Node ids, positions and jammer flags, plus (u, v) edge index arrays, of a networkx or sparse graph
+    if isinstance(G, SparseGraph):
+        u, v, _ = G.edges()
+        return G.nodes['id'], np.asarray(G.nodes['pos'], dtype=float), np.asarray(G.nodes['jammer'], dtype=bool), u, v
 
-    pos = nx.get_node_attributes(G, 'pos')
-    labels = nx.get_node_attributes(G, 'container')
+    ids = list(G.nodes())
+    index = {node: i for i, node in enumerate(ids)}
+    pos = np.array([G.nodes[node]['pos'] for node in ids], dtype=float).reshape(-1, 3)
+    jammer = np.array([G.nodes[node]['jammer'] for node in ids], dtype=bool)
+    edges = np.array([(index[a], index[b]) for a, b in G.edges()], dtype=int).reshape(-1, 2)
+    return ids, pos, jammer, edges[:, 0], edges[:, 1]
 
-    total_steps = len(G.edges()) + len(G.nodes())
-    progress_bar = tqdm(total=total_steps, desc="Rendering graph     ")
 
-    edge_x = []
-    edge_y = []
-    edge_z = []
+def _edge_lines(pos, u, v):
+    # x, y, z lists for a Scatter3d line trace, each edge as its two ends followed by a None break
+    lines = np.full((len(u), 3, 3), None, dtype=object)
+    lines[:, 0] = pos[u]
+    lines[:, 1] = pos[v]
+    return [lines[:, :, axis].ravel().tolist() for axis in range(3)]
 
-    for edge in G.edges():
-        x0, y0, z0 = pos[edge[0]]
-        x1, y1, z1 = pos[edge[1]]
-        edge_x += [x0, x1, None]
-        edge_y += [y0, y1, None]
-        edge_z += [z0, z1, None]
-        progress_bar.update(1)
-
-    edge_trace = go.Scatter3d(
-        x=edge_x,
-        y=edge_y,
-        z=edge_z,
-        line=dict(width=2, color='red'),
-        hoverinfo='none',
-        mode='lines'
-    )
 
-    node_x = []
-    node_y = []
-    node_z = []
-    node_text = []
-    node_color = []
-    node_symbol = []
-
-    for node in G.nodes(data=True):
-        x, y, z = pos[node[0]]
-        degree = len(list(G.neighbors(node[0])))
-        node_x.append(x)
-        node_y.append(y)
-        node_z.append(z)
-        node_text.append(f"{node[0]}<br>Degree: {degree}")
-
-        # Differentiate jamming and normal nodes
-        if node[1]['jammer']:
-            node_color.append('black')  # Set color for jamming nodes
-            node_symbol.append('circle')  # Marker symbol for jamming nodes
-        else:
-            node_color.append('gray')  # Light gray color for normal nodes
-            node_symbol.append('circle')  # Use default marker for normal nodes
-
-        progress_bar.update(1)
-
-    node_trace = go.Scatter3d(
-        x=node_x,
-        y=node_y,
-        z=node_z,
-        text=node_text,
+def _node_trace(ids, pos, jammer, degree, size, honest_color):
+    return go.Scatter3d(
+        x=pos[:, 0],
+        y=pos[:, 1],
+        z=pos[:, 2],
+        text=[f"{node}<br>Degree: {d}" for node, d in zip(ids, degree.tolist())],
         mode='markers',
         hoverinfo='text',
         marker=dict(
-            size=8,
-            color=node_color,
+            size=size,
+            color=np.where(jammer, 'black', honest_color),  # Jamming nodes in black
             opacity=0.8,  # Keep the opacity for all nodes
-            symbol=node_symbol,  # Different symbols for different node types
+            symbol='circle',
             line=dict(width=2, color='black')  # Outline color
         )
     )
 
-    progress_bar.close()
-
-    fig = go.Figure(data=[edge_trace, node_trace])
 
+def _show(fig, name, camera, display):
     fig.update_layout(scene=dict(
         xaxis=dict(title='Bays', showbackground=False, showticklabels=False),
         yaxis=dict(title='Rows', showbackground=False, showticklabels=False),
@@ -141,128 +110,70 @@ def plot_container_network(ship, camera, name, display=True):
         pyo.plot(fig, filename='network_layout.html', auto_open=False)
         fig.write_image(f"{name}.png", width=800, height=600, scale=4)
 
-    return fig, G
 
-def plot_container_network_coloured(ship, camera, name, display=True):
+def _ship_graph(ship, graph):
+    # The graph to plot: the one given (networkx or SparseGraph), else the ship's, built if needed
+    if graph is not None:
+        return graph
     if ship.G is None:
         ship.generate_container_graph()
-    
-    G = ship.G
+    return ship.G
 
-    pos = nx.get_node_attributes(G, 'pos')
-    labels = nx.get_node_attributes(G, 'container')
 
-    total_steps = len(G.edges()) + len(G.nodes())
-    progress_bar = tqdm(total=total_steps, desc="Rendering graph     ")
+def plot_container_network(ship, camera, name, display=True, graph=None):
+    G = _ship_graph(ship, graph)
+    ids, pos, jammer, u, v = _graph_arrays(G)
+    degree = np.bincount(u, minlength=len(ids)) + np.bincount(v, minlength=len(ids))
 
-    # Step 1: Filter out nodes with no edges (degree 0)
-    nodes_with_edges = [n for n in G.nodes() if G.degree(n) > 0]
-    filtered_subgraph = G.subgraph(nodes_with_edges)
-    
-    # Step 2: Find all connected components in the filtered subgraph
-    connected_components = list(nx.connected_components(filtered_subgraph))
+    edge_x, edge_y, edge_z = _edge_lines(pos, u, v)
+    edge_trace = go.Scatter3d(
+        x=edge_x,
+        y=edge_y,
+        z=edge_z,
+        line=dict(width=2, color='red'),
+        hoverinfo='none',
+        mode='lines'
+    )
+
+    fig = go.Figure(data=[edge_trace, _node_trace(ids, pos, jammer, degree, 8, 'gray')])
+    _show(fig, name, camera, display)
+
+    return fig, G
 
-    # Step 3: Define a color map for the connected components
+
+def plot_container_network_coloured(ship, camera, name, display=True, graph=None):
+    G = _ship_graph(ship, graph)
+    ids, pos, jammer, u, v = _graph_arrays(G)
+    degree = np.bincount(u, minlength=len(ids)) + np.bincount(v, minlength=len(ids))
+
+    # Connected components among nodes with edges, numbered by their first node
+    adjacency = coo_matrix((np.ones(len(u), dtype=bool), (u, v)), shape=(len(ids), len(ids)))
+    _, labels = sparse_connected_components(adjacency, directed=False)
+    connected = degree > 0
+    components, first_node = np.unique(labels[connected], return_index=True)
+    rank = np.empty(labels.max() + 1 if len(labels) else 0, dtype=int)
+    rank[components[np.argsort(first_node)]] = np.arange(len(components))
+
+    # One edge trace per colour, cycling through the colours if there are more components than colours
     colors = ['red', 'blue', 'green', 'orange', 'purple', 'cyan', 'magenta']
-    edge_colors = {}
-    
-    # Assign a unique color to all edges in each connected component
-    for i, component in enumerate(connected_components):
-        color = colors[i % len(colors)]  # Cycle through colors if more components than colors
-        for node in component:
-            for neighbor in G.neighbors(node):  # Iterate through all neighbors of the node
-                if neighbor in component:  # Ensure we only color edges within the same component
-                    edge_colors[(node, neighbor)] = color
-                    edge_colors[(neighbor, node)] = color  # Assign color to both directions
-
-    # Create a list to store edge traces for different colors
+    edge_color = rank[labels[u]] % len(colors)
     edge_traces = []
-
-    # Group edges by color and create separate traces
-    for color in set(edge_colors.values()):
-        edge_x = []
-        edge_y = []
-        edge_z = []
-
-        # Collect all edges of the same color
-        for (node, neighbor), edge_color in edge_colors.items():
-            if edge_color == color:
-                x0, y0, z0 = pos[node]
-                x1, y1, z1 = pos[neighbor]
-                edge_x += [x0, x1, None]
-                edge_y += [y0, y1, None]
-                edge_z += [z0, z1, None]
-
-        # Create a trace for edges of this color
-        edge_trace = go.Scatter3d(
+    for i, color in enumerate(colors):
+        in_color = edge_color == i
+        if not in_color.any():
+            continue
+        edge_x, edge_y, edge_z = _edge_lines(pos, u[in_color], v[in_color])
+        edge_traces.append(go.Scatter3d(
             x=edge_x,
             y=edge_y,
             z=edge_z,
             line=dict(width=2, color=color),  # Set color for this trace
             hoverinfo='none',
             mode='lines'
-        )
-        edge_traces.append(edge_trace)  # Add trace to the list
-
-    # Combine all traces, including edges and nodes
-    fig = go.Figure(data=edge_traces)  # Start with edge traces
-
-    node_x = []
-    node_y = []
-    node_z = []
-    node_text = []
-    node_color = []
-    node_symbol = []
-
-    for node in G.nodes(data=True):
-        x, y, z = pos[node[0]]
-        degree = len(list(G.neighbors(node[0])))
-        node_x.append(x)
-        node_y.append(y)
-        node_z.append(z)
-        node_text.append(f"{node[0]}<br>Degree: {degree}")
-
-        # Differentiate jamming and normal nodes
-        if node[1]['jammer']:
-            node_color.append('black')  # Set color for jamming nodes
-            node_symbol.append('circle')  # Marker symbol for jamming nodes
-        else:
-            node_color.append('lightgray')  # Light gray color for normal nodes
-            node_symbol.append('circle')  # Use default marker for normal nodes
-
-        progress_bar.update(1)
-
-    node_trace = go.Scatter3d(
-        x=node_x,
-        y=node_y,
-        z=node_z,
-        text=node_text,
-        mode='markers',
-        hoverinfo='text',
-        marker=dict(
-            size=5,
-            color=node_color,
-            opacity=0.8,  # Keep the opacity for all nodes
-            symbol=node_symbol,  # Different symbols for different node types
-            line=dict(width=2, color='black')  # Outline color
-        )
-    )
-
-    fig.add_trace(node_trace)  # Add node trace
+        ))
 
-    progress_bar.close()
-
-    fig.update_layout(scene=dict(
-        xaxis=dict(title='Bays', showbackground=False, showticklabels=False),
-        yaxis=dict(title='Rows', showbackground=False, showticklabels=False),
-        zaxis=dict(title='Layers', showbackground=False, showticklabels=False),
-        aspectmode='data',
-        camera=camera
-    ),
-    showlegend=False)
-
-    if display:
-        pyo.plot(fig, filename='network_layout.html', auto_open=False)
-        fig.write_image(f"{name}.png", width=800, height=600, scale=4)
+    fig = go.Figure(data=edge_traces)
+    fig.add_trace(_node_trace(ids, pos, jammer, degree, 5, 'lightgray'))
+    _show(fig, name, camera, display)
 
     return fig, G
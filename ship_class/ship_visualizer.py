@@ -79,6 +79,7 @@ def add_box_wireframe(fig, cell, x, y, z, opacity=1.0):
 
 
 def add_container_centers(fig, ship):
+    cells = ship.cells
     container_x = []
     container_y = []
     container_z = []
@@ -86,7 +87,7 @@ def add_container_centers(fig, ship):
     for x in range(ship.bays):
         for y in range(ship.rows):
             for z in range(ship.layers):
-                cell = ship.cells[x][y][z]
+                cell = cells[x][y][z]
                 if cell.container:
                     container_x.append(cell.container.x)
                     container_y.append(cell.container.y)
@@ -111,6 +112,7 @@ def add_container_centers(fig, ship):
 
 
 def add_cell_centers(fig, ship):
+    cells = ship.cells
     cell_x = []
     cell_y = []
     cell_z = []
@@ -118,7 +120,7 @@ def add_cell_centers(fig, ship):
     for x in range(ship.bays):
         for y in range(ship.rows):
             for z in range(ship.layers):
-                cell = ship.cells[x][y][z]
+                cell = cells[x][y][z]
                 cell_x.append(cell.x)
                 cell_y.append(cell.y)
                 cell_z.append(cell.z)
@@ -138,6 +140,7 @@ import plotly.offline as pyo
 from tqdm import tqdm
 
 def plot_ship_layout(ship, display=True):
+    cells = ship.cells
     fig = go.Figure()
     total_steps = ship.bays * ship.rows * ship.layers * 3
 
@@ -146,7 +149,7 @@ def plot_ship_layout(ship, display=True):
         for x in range(ship.bays):
             for y in range(ship.rows):
                 for z in range(ship.layers):
-                    cell = ship.cells[x][y][z]
+                    cell = cells[x][y][z]
                     x_pos = x * cell.length
                     y_pos = y * cell.width
                     z_pos = z * cell.height
@@ -165,7 +168,7 @@ def plot_ship_layout(ship, display=True):
         for x in range(ship.bays):
             for y in range(ship.rows):
                 for z in range(ship.layers):
-                    cell = ship.cells[x][y][z]
+                    cell = cells[x][y][z]
                     x_pos = x * cell.length
                     y_pos = y * cell.width
                     z_pos = z * cell.height
@@ -177,7 +180,7 @@ def plot_ship_layout(ship, display=True):
         for x in range(ship.bays):
             for y in range(ship.rows):
                 for z in range(ship.layers):
-                    cell = ship.cells[x][y][z]
+                    cell = cells[x][y][z]
                     x_pos = x * cell.length
                     y_pos = y * cell.width
                     z_pos = z * cell.height